@@ -5,21 +5,50 @@ import uuid
 from datetime import timedelta
 
 # Import der UI-Module
-from ui.ui_sidebar import get_sidebar_inputs
+from ui.ui_sidebar import get_sidebar_inputs, get_view_choice
+from ui.ui_dashboard import display_dashboard
 from ui.ui_display import display_results
+from ui.ui_longrange import display_longrange_chart
+from ui.ui_progress import display_job_progress
 
 # Import der Berechnungs-Module
-from calculations.calc_360 import run_360_model
-from calculations.calc_vormonat_vorjahr_fix import run_vorjahr_model, run_vormonat_model
+from calculations.calc_pipeline import DATA_BUFFER, build_display_data, model_stages, run_models_job
+from calculations.calc_jobs import get_job_runner
+from calculations.calc_prefetch import PrefetchScheduler, watchlist_from_env
+from calculations.calc_memory import memory_report, format_bytes
+from calculations.calc_timing import timed_stage
+from data.data_store import get_store
+
+# Sekunden, die ein Lauf direkt abgewartet wird, bevor die Fortschrittsanzeige erscheint
+JOB_FAST_PATH_SECONDS = 0.5
+
+
+@st.cache_resource
+def start_prefetch_scheduler():
+    """
+    Einmal pro Server-Prozess: Hintergrund-Prefetch für die Watchlist
+    (PREFETCH_WATCHLIST) starten. Leere Watchlist => kein Scheduler.
+    """
+    watchlist = watchlist_from_env()
+    if not watchlist:
+        return None
+    scheduler = PrefetchScheduler(watchlist)
+    scheduler.start()
+    return scheduler
+
 
 def main():
     # Eindeutige Run-ID zur Debug-Ausgabe
     run_id = uuid.uuid4()
 
+    # Hintergrund-Prefetch (nur beim ersten Lauf des Prozesses gestartet)
+    start_prefetch_scheduler()
+
     # Titel
     st.title("Gannigma App für Base: Preise")
 
-    # 1) Eingaben aus der Sidebar holen
+    # 1) Ansicht und Eingaben aus der Sidebar holen
+    view = get_view_choice()
     inputs = get_sidebar_inputs()
 
     # --- NEUE DEBUG-AUSGABE IM TERMINAL ---
@@ -31,6 +60,12 @@ def main():
     # Zur Verdeutlichung schreiben wir die Inputs nochmals in die Streamlit-Oberfläche
     st.write(f"DEBUG in app.py - start_button = {inputs['start_button']} | Run-ID = {run_id}")
 
+    # Watchlist-Dashboard: eigene Seite, nutzt nur die Modell-Parameter der Sidebar
+    if view == "Watchlist-Dashboard":
+        print("[DEBUG] View = Watchlist-Dashboard => display_dashboard()")
+        display_dashboard(inputs)
+        return
+
     # 2) Warten, bis der Benutzer auf 'Berechnen' klickt
     if not inputs["start_button"]:
         # --- NEUE DEBUG-AUSGABE IM TERMINAL ---
@@ -51,132 +86,118 @@ def main():
     small_div = inputs["small_div"]
     vj_divider = inputs["vj_divider"]  # Teiler Vorjahr
     vm_divider = inputs["vm_divider"]  # Teiler Vormonat
-
-    data_buffer = 2000  # ca. 5 Jahre
-
-    # 4) Versuche die Modelle auszuführen
-    try:
-        # --- NEUE DEBUG-AUSGABE IM TERMINAL ---
-        print("[DEBUG] Calling run_360_model...")
-        result_360 = run_360_model(
+    anchor_periods = inputs.get("anchor_periods", 0)  # Weitere Anker je Art
+
+    data_buffer = DATA_BUFFER  # ca. 5 Jahre
+
+    # 4) Modelle im Hintergrund rechnen lassen (calc_jobs). Neue Eingaben
+    #    brechen einen noch laufenden, veralteten Job ab. Neu gerechnet wird
+    #    auch bei jedem 'Berechnen' und sobald sich die Kursdaten geändert
+    #    haben (Daten-Version des Ergebnisses, z.B. nach einer Hintergrund-
+    #    Auffrischung) – unveränderte Modelle kommen aus dem Ergebnis-Cache.
+    job_key = (ticker, analysis_date, mode_choice, volatility, atr_period, big_rhythm,
+               small_div, vj_divider, vm_divider, anchor_periods)
+    submit_count = st.session_state.get("submit_count", 0)
+    job = st.session_state.get("model_job")
+    if (job is None or job.key != job_key
+            or st.session_state.get("model_job_submit") != submit_count
+            or (job.status == "fertig"
+                and job.result["data_version"] != get_store().version(ticker))):
+        if job is not None:
+            job.cancel()
+        print(f"[DEBUG] Submitting model job for {job_key}")
+        job = get_job_runner().submit(
+            job_key,
+            model_stages(anchor_periods),
+            run_models_job,
             ticker=ticker,
             analysis_date=analysis_date,
             mode_choice=mode_choice,
-            volatility_choice=volatility,
-            main_rhythm=big_rhythm,
-            selected_small_div=small_div,
+            volatility=volatility,
             atr_period=atr_period,
+            big_rhythm=big_rhythm,
+            small_div=small_div,
+            vj_divider=vj_divider,
+            vm_divider=vm_divider,
+            anchor_periods=anchor_periods,
             data_buffer=data_buffer
         )
-        print("[DEBUG] run_360_model finished successfully.")
-
-        print("[DEBUG] Calling run_vorjahr_model...")
-        result_vorjahr = run_vorjahr_model(
-            ticker=ticker,
-            analysis_date=analysis_date,
-            mode_choice=mode_choice,
-            divider_val=vj_divider,
-            vol_sel=volatility,
-            atr_period=atr_period,
-            databuf=data_buffer
-        )
-        print("[DEBUG] run_vorjahr_model finished successfully.")
-
-        print("[DEBUG] Calling run_vormonat_model...")
-        result_vormonat = run_vormonat_model(
-            ticker=ticker,
-            analysis_date=analysis_date,
-            mode_choice=mode_choice,
-            divider_val=vm_divider,
-            vol_choice=volatility,
-            atr_period=atr_period,
-            databuf=data_buffer
-        )
-        print("[DEBUG] run_vormonat_model finished successfully.")
-
-    except ValueError as ve:
-        # Falls falsches Kürzel / keine Daten
-        st.error(str(ve))
-        # --- NEUE DEBUG-AUSGABE IM TERMINAL ---
-        print(f"[DEBUG] Caught ValueError: {ve}")
-        print("[DEBUG] Aborting with return.")
+        st.session_state["model_job"] = job
+        st.session_state["model_job_submit"] = submit_count
+
+    # Schnelle Läufe (Cache-Treffer) ohne Fortschrittsanzeige abwarten
+    job.touch()
+    if not job.wait(JOB_FAST_PATH_SECONDS):
+        print(f"[DEBUG] Job {job.id} still running => progress fragment")
+        display_job_progress(job)
+        st.stop()
+
+    if job.status == "abgebrochen":
+        st.info("Berechnung abgebrochen. Zum Neustart auf 'Berechnen' klicken.")
         return
-    except Exception as e:
-        # Allgemeiner Fehler
-        st.error(f"Fehler bei der Berechnung: {e}")
+    if job.status == "fehler":
+        if isinstance(job.error, ValueError):
+            # Falls falsches Kürzel / keine Daten
+            st.error(str(job.error))
+        else:
+            # Allgemeiner Fehler
+            st.error(f"Fehler bei der Berechnung: {job.error}")
         # --- NEUE DEBUG-AUSGABE IM TERMINAL ---
-        print(f"[DEBUG] Caught general Exception: {e}")
+        print(f"[DEBUG] Job {job.id} failed: {job.error!r}")
         print("[DEBUG] Aborting with return.")
         return
 
-    # 5) Basisdaten für die Anzeige (z.B. aus 360°-Ergebnis)
-    basisdaten = {
-        "analysis_date": analysis_date,
-        "vortageskerze": result_360.get("extreme_date", "n/a"),
-        "atr_value": result_360.get("atr", None),
-        "range_unten": result_360.get("lb", None),
-        "range_oben": result_360.get("ub", None),
-        "mode_choice": mode_choice
-    }
-
-    # 6) In-Range & Expansionswerte
-    inrange_360 = result_360.get("in_range_vals", [])
-    expansions_360 = result_360.get("expansions_vals", [])
-    inrange_vorjahr = result_vorjahr.get("preise_inrange_vorjahr", [])
-    expansions_vorjahr = result_vorjahr.get("preise_ausserhalb_vorjahr", [])
-    inrange_vormonat = result_vormonat.get("preise_inrange_vormonat", [])
-    expansions_vormonat = result_vormonat.get("preise_ausserhalb_vormonat", [])
-
-    # 7) Chart-Daten (z.B. aus dem 360°-Ergebnis)
-    df_chart = result_360.get("df_chart", None)
-    if df_chart is not None and not df_chart.empty:
-        df_chart = df_chart.tail(10)
-    else:
-        df_chart = None
-
-    # 8) Zusammenfassung der Ergebnisse (ergebnisse-Dict)
-    ergebnisse = {
-        # 360°
-        "preise_inrange_360": inrange_360,
-        "preise_ausserhalb_360": expansions_360,
-        # Vorjahr
-        "preise_inrange_vorjahr": inrange_vorjahr,
-        "preise_ausserhalb_vorjahr": expansions_vorjahr,
-        # Vormonat
-        "preise_inrange_vormonat": inrange_vormonat,
-        "preise_ausserhalb_vormonat": expansions_vormonat,
-        # Chart
-        "df_chart": df_chart,
-        # Datencheck
-        "vj_high": result_vorjahr.get("vj_high"),
-        "vj_low": result_vorjahr.get("vj_low"),
-        "vj_range": None,
-        "vj_teiler": result_vorjahr.get("divider_val"),
-        "vj_schritt": result_vorjahr.get("step_val"),
-        "vm_high": result_vormonat.get("m_high"),
-        "vm_low": result_vormonat.get("m_low"),
-        "vm_range": None,
-        "vm_teiler": result_vormonat.get("divider_val"),
-        "vm_schritt": result_vormonat.get("step_val")
-    }
-
-    # 9) Range-Berechnungen (Vorjahr & Vormonat)
-    if ergebnisse["vj_high"] is not None and ergebnisse["vj_low"] is not None:
-        ergebnisse["vj_range"] = ergebnisse["vj_high"] - ergebnisse["vj_low"]
-    if ergebnisse["vm_high"] is not None and ergebnisse["vm_low"] is not None:
-        ergebnisse["vm_range"] = ergebnisse["vm_high"] - ergebnisse["vm_low"]
+    print(f"[DEBUG] Job {job.id} finished successfully.")
+    result_360 = job.result["result_360"]
+    result_vorjahr = job.result["result_vorjahr"]
+    result_vormonat = job.result["result_vormonat"]
+    anchor_results = job.result["anchor_results"]
+
+    # Hinweis, falls (noch) ältere Kursdaten aus dem Cache verwendet wurden
+    data_status = get_store().status(ticker)
+    if data_status["stale"]:
+        hinweis = "Kursdaten evtl. nicht aktuell (Cache), Aktualisierung läuft im Hintergrund."
+        if data_status["last_error"]:
+            hinweis += f" Letzter Fehler: {data_status['last_error']}"
+        st.warning(hinweis)
+
+    # Auffälligkeiten aus der Datenprüfung beim Import (data_ingest)
+    ingest_report = get_store().ingest_report(ticker)
+    if ingest_report is not None and not ingest_report.anomalies.empty:
+        with st.expander(f"Datenqualität: {len(ingest_report.anomalies)} Auffälligkeiten {ingest_report.counts()}"):
+            st.dataframe(ingest_report.anomalies, width="stretch")
+
+    # 5) - 9) Basisdaten, In-Range/Expansionswerte, Chart & Datencheck zusammenfassen
+    basisdaten, ergebnisse = build_display_data(
+        result_360, result_vorjahr, result_vormonat, analysis_date, mode_choice
+    )
+
+    # Speicherbericht (Session + gemeinsame Caches)
+    with st.sidebar.expander("Speicherverbrauch"):
+        mem = memory_report(st.session_state)
+        st.write(f"**Diese Session** : {format_bytes(mem['session_bytes'])}")
+        st.write(f"**Kursdaten (alle Sessions)** : {format_bytes(mem['store_bytes'])} / "
+                 f"{format_bytes(mem['store_budget'])} ({mem['store_tickers']} Ticker)")
+        st.write(f"**Ergebnis-Cache** : {format_bytes(mem['result_cache_bytes'])} / "
+                 f"{format_bytes(mem['result_cache_budget'])} ({mem['result_cache_entries']} Einträge)")
 
     # 10) Abschließende Darstellung
     # --- NEUE DEBUG-AUSGABE IM TERMINAL ---
     print("[DEBUG] Displaying final results via display_results()")
-    display_results(
-        ticker,
-        basisdaten,
-        ergebnisse,
-        volatility,
-        big_rhythm,
-        small_div
-    )
+    with timed_stage("display"):
+        display_results(
+            ticker,
+            basisdaten,
+            ergebnisse,
+            volatility,
+            big_rhythm,
+            small_div,
+            anchor_results
+        )
+
+    # 11) Optional: Langfrist-Chart über die volle Historie
+    if inputs["show_longrange"]:
+        display_longrange_chart(ticker, analysis_date, basisdaten, ergebnisse)
     print("[DEBUG] main() finished successfully.\n")
 
 
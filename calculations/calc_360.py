@@ -1,42 +1,26 @@
 # calc_360.py
 
-import yfinance as yf
 import math
 from datetime import timedelta
 import pandas as pd
-import plotly.graph_objects as go
+
+from data.data_store import get_store
+from calculations.calc_cache import run_model_cached
+from calculations.calc_results import ModelResult
 
 def load_data_daily(ticker, start_date, end_date):
     """
-    Holt die Kursdaten via yfinance.
-    Falls das heruntergeladene DataFrame leer ist,
+    Holt die Kursdaten aus dem gemeinsamen Historien-Speicher
+    (data_store, lädt bei Bedarf via yfinance nach).
+    Falls das DataFrame leer ist,
     werfen wir einen ValueError.
     """
     print(f"[DEBUG calc_360] load_data_daily(ticker={ticker}, start={start_date}, end={end_date})")
-    df = yf.download(
-        ticker,
-        start=start_date,
-        end=end_date,
-        interval='1d',
-        progress=False,
-        auto_adjust=False  # oder True, je nach Bedarf
-    )
-
-    # -------------------------------------------
-    # NEUE ZEILEN: MultiIndex-Spalten entfernen
-    # -------------------------------------------
-    if isinstance(df.columns, pd.MultiIndex):
-        print("[DEBUG calc_360] Detected MultiIndex columns. Dropping level=1.")
-        df.columns = df.columns.droplevel(1)
+    df = get_store().get_range(ticker, start_date, end_date)
 
     if df.empty:
         raise ValueError(f"Falsches Wertpapierkürzel oder keine Daten (360) für {ticker}!")
 
-    # Index anpassen
-    df.reset_index(inplace=True)
-    df['Date'] = pd.to_datetime(df['Date'])
-    df.set_index('Date', inplace=True)
-
     return df
 
 
@@ -90,27 +74,23 @@ def calculate_atr(df, period=14):
     return df
 
 
-def run_360_model(
+def compute_360_range(
     ticker,
     analysis_date,
     mode_choice,
     volatility_choice,
-    main_rhythm,
-    selected_small_div,
     atr_period,
     data_buffer
 ):
     """
-    Implementiert das "360°"-Preismodell:
-      1) ATR-Range [lb, ub] über Extrem-Kerze (letzte 3 Tage) + Volatilitätsfaktor
-      2) 360°-Liste ab 0 in Schritten von 'selected_small_div' bis max_val
-      3) In-Range = alle Werte in [lb, ub], absteigend sortiert
-      4) 4 Expansions oberhalb (hoch) oder unterhalb (tief) der Range
+    Stufe 1 des 360°-Modells (unabhängig vom Teiler):
+    Daten laden, Extrem-Kerze (letzte 3 Tage), ATR und Range [lb, ub].
+    Wird separat gecacht, so dass ein geänderter kleiner Teiler nur
+    Stufe 2 (build_360_levels) neu rechnet.
     """
-    print(f"[DEBUG calc_360] run_360_model("
+    print(f"[DEBUG calc_360] compute_360_range("
           f"ticker={ticker}, date={analysis_date}, mode={mode_choice}, "
-          f"volatility={volatility_choice}, big_rhythm={main_rhythm}, "
-          f"small_div={selected_small_div}, atr_period={atr_period}, data_buffer={data_buffer})")
+          f"volatility={volatility_choice}, atr_period={atr_period}, data_buffer={data_buffer})")
 
     # 1) Daten laden
     total_days = data_buffer + atr_period + 5
@@ -160,44 +140,102 @@ def run_360_model(
     lb = round(lb, 4)
     ub = round(ub, 4)
 
-    # 4) 360°-Schritte
-    steps = []
-    val = 0.0
-    max_val = 500000.0
-    while val <= max_val:
-        steps.append(round(val, 4))
-        val += selected_small_div
+    result = ModelResult(
+        "360-range", ticker, analysis_date,
+        extreme_date=extreme_date,
+        atr=round(curr_atr, 4),
+        lb=lb,
+        ub=ub,
+        basis=round(basis, 4),
+    )
+
+    # Letzte 10 Kerzen im Chart (nur der Zeitraum wird gemerkt)
+    result.set_chart_span(df_cut.tail(10))
+    return result
 
-    # In-Range = [lb, ub]
-    in_range_vals = [x for x in steps if (x >= lb and x <= ub)]
+
+def build_360_levels(lb, ub, mode_choice, selected_small_div, max_val=500000.0):
+    """
+    Stufe 2 des 360°-Modells: 360°-Raster ab 0 in Schritten von
+    'selected_small_div' bis max_val, davon
+      - In-Range = alle Werte in [lb, ub], absteigend sortiert
+      - 4 Expansions oberhalb (hoch) oder unterhalb (tief) der Range
+    Rasterwert i = round(i * Teiler, 4); es werden nur die Indizes rund
+    um [lb, ub] erzeugt statt des kompletten Rasters bis max_val.
+    """
+    step = float(selected_small_div)
+    n_max = int(math.floor(max_val / step))
+
+    def grid(i):
+        return round(i * step, 4)
+
+    # In-Range = [lb, ub] (je ein Index Puffer gegen Rundungseffekte)
+    i_lo = max(0, int(math.floor(lb / step)) - 1)
+    i_hi = min(n_max, int(math.ceil(ub / step)) + 1)
+    in_range_vals = [grid(i) for i in range(i_lo, i_hi + 1) if lb <= grid(i) <= ub]
     in_range_vals.sort(reverse=True)
 
     # Expansions: 4 Werte ober- oder unterhalb
     expansions_vals = []
     if mode_choice == "hoch":
-        bigger_candidates = [x for x in steps if x > ub]
-        bigger_candidates.sort()
-        expansions_vals = bigger_candidates[:4]
+        i = max(0, int(math.floor(ub / step)) - 1)
+        while len(expansions_vals) < 4 and i <= n_max:
+            if grid(i) > ub:
+                expansions_vals.append(grid(i))
+            i += 1
         expansions_vals.sort(reverse=True)
     else:
-        smaller_candidates = [x for x in steps if x < lb]
-        smaller_candidates.sort(reverse=True)
-        expansions_vals = smaller_candidates[:4]
-
-    # 5) Letzte 10 Kerzen im Chart
-    df_chart = df_cut.tail(10)
-    print("[DEBUG calc_360] df_chart shape =", df_chart.shape)
-
-    results = {
-        "df_cut": df_cut,
-        "df_chart": df_chart,
-        "extreme_date": extreme_date,
-        "atr": round(curr_atr, 4),
-        "lb": lb,
-        "ub": ub,
-        "in_range_vals": in_range_vals,
-        "expansions_vals": expansions_vals,
-        "basis": round(basis, 4),
-    }
+        i = min(n_max, int(math.ceil(lb / step)) + 1)
+        while len(expansions_vals) < 4 and i >= 0:
+            if grid(i) < lb:
+                expansions_vals.append(grid(i))
+            i -= 1
+
+    return in_range_vals, expansions_vals
+
+
+def run_360_model(
+    ticker,
+    analysis_date,
+    mode_choice,
+    volatility_choice,
+    main_rhythm,
+    selected_small_div,
+    atr_period,
+    data_buffer
+):
+    """
+    Implementiert das "360°"-Preismodell:
+      1) ATR-Range [lb, ub] über Extrem-Kerze (letzte 3 Tage) + Volatilitätsfaktor
+      2) 360°-Liste ab 0 in Schritten von 'selected_small_div' bis max_val
+      3) In-Range = alle Werte in [lb, ub], absteigend sortiert
+      4) 4 Expansions oberhalb (hoch) oder unterhalb (tief) der Range
+    """
+    print(f"[DEBUG calc_360] run_360_model("
+          f"ticker={ticker}, date={analysis_date}, mode={mode_choice}, "
+          f"volatility={volatility_choice}, big_rhythm={main_rhythm}, "
+          f"small_div={selected_small_div}, atr_period={atr_period}, data_buffer={data_buffer})")
+
+    # 1) Range-Stufe (gecacht, unabhängig vom Teiler)
+    range_result = run_model_cached(
+        compute_360_range,
+        ticker=ticker,
+        analysis_date=analysis_date,
+        mode_choice=mode_choice,
+        volatility_choice=volatility_choice,
+        atr_period=atr_period,
+        data_buffer=data_buffer
+    )
+
+    # 2) - 4) 360°-Raster, In-Range & Expansions
+    in_range_vals, expansions_vals = build_360_levels(
+        range_result.lb, range_result.ub, mode_choice, selected_small_div
+    )
+    results = range_result.replace(
+        model="360",
+        in_range=in_range_vals,
+        expansions=expansions_vals,
+    )
+
     print("[DEBUG calc_360] run_360_model completed.")
     return results
@@ -0,0 +1,223 @@
+# calc_anchors.py
+"""
+Anker-Engine: Hoch/Tief der vorherigen N Jahre, Quartale, Monate und
+Wochen aus EINER gecachten Historie (data_store).
+
+Die Kerzen werden nur einmal auf Monatsebene gruppiert; Jahre und
+Quartale ergeben sich aus den Monatswerten, Wochen aus einer zweiten
+Gruppierung desselben Ausschnitts. Weitere Anker kosten damit weder
+zusätzliche Downloads noch eigene Durchläufe über die Kerzen.
+
+Die Anker speisen dieselbe Level-Reihe wie Vorjahr/Vormonat
+(build_anchor_levels): ab Tief in Schritten von (Hoch - Tief) / Teiler.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data.data_store import get_store
+from calculations.calc_cache import run_model_cached
+from calculations.calc_360 import compute_360_range
+
+ANCHOR_KINDS = ("year", "quarter", "month", "week")
+ANCHOR_NAMES = {"year": "Jahr", "quarter": "Quartal", "month": "Monat", "week": "Woche"}
+
+
+class Anchor:
+    """
+    Hoch/Tief eines abgeschlossenen Zeitraums vor dem Analysedatum.
+    kind: "year", "quarter", "month" oder "week"; start: erster Tag des Zeitraums
+    """
+
+    __slots__ = ("kind", "label", "start", "high", "low")
+
+    def __init__(self, kind, label, start, high, low):
+        self.kind = kind
+        self.label = label
+        self.start = start
+        self.high = high
+        self.low = low
+
+    def __repr__(self):
+        return f"Anchor({self.kind} {self.label}: {self.low} - {self.high})"
+
+
+def _period_bounds(analysis_date, kind, n):
+    """
+    (Beginn des ältesten benötigten Zeitraums, Beginn des laufenden Zeitraums)
+    """
+    freq = {"year": "Y", "quarter": "Q", "month": "M", "week": "W-SUN"}[kind]
+    current = pd.Timestamp(analysis_date).to_period(freq)
+    return (current - n).start_time, current.start_time
+
+
+def compute_anchors(df, analysis_date, n_years=1, n_quarters=0, n_months=1, n_weeks=0):
+    """
+    Anker aus einer Historie (Date-Index sortiert, Spalten High/Low).
+    Gibt eine Liste von Anchor zurück: je Typ die vorherigen N Zeiträume,
+    jüngster zuerst; Zeiträume ohne Kerzen fehlen.
+    """
+    counts = {"year": n_years, "quarter": n_quarters, "month": n_months, "week": n_weeks}
+    bounds = {k: _period_bounds(analysis_date, k, n) for k, n in counts.items() if n > 0}
+    if not bounds or df.empty:
+        return []
+
+    # Nur der benötigte Ausschnitt [ältester Beginn, Analysedatum)
+    window_start = min(b[0] for b in bounds.values())
+    i0 = df.index.searchsorted(window_start, side="left")
+    i1 = df.index.searchsorted(pd.Timestamp(analysis_date), side="left")
+    sub = df.iloc[i0:i1]
+    if sub.empty:
+        return []
+
+    high = sub['High'].to_numpy()
+    low = sub['Low'].to_numpy()
+    anchors = []
+
+    # Ein Durchlauf auf Monatsebene (Monatsnummer seit Jahr 0)
+    if any(k in bounds for k in ("year", "quarter", "month")):
+        month_no = sub.index.year.to_numpy() * 12 + sub.index.month.to_numpy() - 1
+        monthly = pd.DataFrame({"High": high, "Low": low, "m": month_no}).groupby("m", sort=True).agg(
+            High=("High", "max"), Low=("Low", "min"))
+
+        rollups = {
+            "year": (monthly.index // 12, lambda k: (pd.Timestamp(int(k), 1, 1), str(int(k)))),
+            "quarter": (monthly.index // 3, lambda k: (pd.Timestamp(int(k) // 4, (int(k) % 4) * 3 + 1, 1),
+                                                     f"Q{int(k) % 4 + 1} {int(k) // 4}")),
+            "month": (monthly.index, lambda k: (pd.Timestamp(int(k) // 12, int(k) % 12 + 1, 1),
+                                                f"{int(k) % 12 + 1:02d}.{int(k) // 12}")),
+        }
+        for kind in ("year", "quarter", "month"):
+            if kind not in bounds:
+                continue
+            keys, describe = rollups[kind]
+            grouped = monthly.groupby(np.asarray(keys), sort=True).agg(High=("High", "max"), Low=("Low", "min"))
+            start, current = bounds[kind]
+            for key in grouped.index[::-1]:
+                period_start, label = describe(key)
+                if start <= period_start < current:
+                    row = grouped.loc[key]
+                    anchors.append(Anchor(kind, label, period_start, row['High'], row['Low']))
+
+    if "week" in bounds:
+        start, current = bounds["week"]
+        j0 = sub.index.searchsorted(start, side="left")
+        j1 = sub.index.searchsorted(current, side="left")
+        wk = sub.iloc[j0:j1]
+        if not wk.empty:
+            week_start = wk.index.to_period("W-SUN").start_time
+            weekly = wk.groupby(week_start, sort=True).agg(High=("High", "max"), Low=("Low", "min"))
+            for ws in weekly.index[::-1]:
+                iso = ws.isocalendar()
+                anchors.append(Anchor("week", f"KW {iso[1]:02d}/{iso[0]}", ws,
+                                      weekly.loc[ws, 'High'], weekly.loc[ws, 'Low']))
+
+    order = {k: i for i, k in enumerate(ANCHOR_KINDS)}
+    anchors.sort(key=lambda a: order[a.kind])
+    return anchors
+
+
+def compute_anchor_table(ticker, analysis_date, n_years=1, n_quarters=0, n_months=1, n_weeks=0):
+    """
+    compute_anchors über die gemeinsame Historie von 'ticker'
+    (über run_model_cached gecacht).
+    """
+    return compute_anchors(get_store().get_history(ticker), analysis_date,
+                           n_years, n_quarters, n_months, n_weeks)
+
+
+def previous_anchor(ticker, analysis_date, kind):
+    """
+    Anker des direkt vorangegangenen Jahres / Monats (Vorjahr-/Vormonat-Modell).
+    Beide Modelle teilen sich dieselbe gecachte Anker-Tabelle.
+    """
+    anchors = run_model_cached(
+        compute_anchor_table,
+        ticker=ticker,
+        analysis_date=analysis_date,
+        n_years=1,
+        n_quarters=0,
+        n_months=1,
+        n_weeks=0
+    )
+    for a in anchors:
+        if a.kind == kind:
+            return a
+    return None
+
+
+def build_anchor_levels(anchor_low, anchor_high, divider_val, lb, ub, mode_choice, max_steps=80):
+    """
+    Level-Reihe eines Ankers: ab Tief in Schritten von (Hoch-Tief)/Teiler,
+    max_steps Schritte. Gibt (step_val, in_range, expansions) zurück:
+      - In-Range = Werte in [lb, ub], absteigend
+      - 4 Expansions oberhalb (hoch) bzw. unterhalb (tief) der Range
+    """
+    step_val = (anchor_high - anchor_low) / float(divider_val)
+    step_val = round(step_val, 4)
+    sequence = [round(anchor_low + i * step_val, 4) for i in range(max_steps + 1)]
+
+    in_range = [x for x in sequence if lb <= x <= ub]
+    in_range.sort(reverse=True)
+
+    expansions = []
+    if mode_choice == "hoch":
+        ex_up = [x for x in sequence if x > ub]
+        ex_up.sort()
+        expansions = ex_up[:4]
+        expansions.sort(reverse=True)
+    else:
+        ex_down = [x for x in sequence if x < lb]
+        ex_down.sort(reverse=True)
+        expansions = ex_down[:4]
+
+    return step_val, in_range, expansions
+
+
+def run_anchor_models(ticker, analysis_date, mode_choice, volatility_choice, atr_period, data_buffer,
+                      year_divider, month_divider, n_years=0, n_quarters=0, n_months=0, n_weeks=0):
+    """
+    Level für beliebig viele Anker in einem Rutsch. Die ATR-Range kommt aus
+    der (gecachten) Range-Stufe des 360°-Modells, die Anker aus einer
+    gecachten Anker-Tabelle. Jahre/Quartale nutzen 'year_divider',
+    Monate/Wochen 'month_divider'. Anker ohne Spanne werden übersprungen.
+    Gibt eine Liste von ModelResult (model="anker-<typ>") zurück.
+    """
+    range_result = run_model_cached(
+        compute_360_range,
+        ticker=ticker,
+        analysis_date=analysis_date,
+        mode_choice=mode_choice,
+        volatility_choice=volatility_choice,
+        atr_period=atr_period,
+        data_buffer=data_buffer
+    )
+    anchors = run_model_cached(
+        compute_anchor_table,
+        ticker=ticker,
+        analysis_date=analysis_date,
+        n_years=n_years,
+        n_quarters=n_quarters,
+        n_months=n_months,
+        n_weeks=n_weeks
+    )
+
+    results = []
+    for a in anchors:
+        if a.high - a.low <= 0:
+            continue
+        divider_val = year_divider if a.kind in ("year", "quarter") else month_divider
+        step_val, in_range, expansions = build_anchor_levels(
+            a.low, a.high, divider_val, range_result.lb, range_result.ub, mode_choice
+        )
+        results.append(range_result.replace(
+            model=f"anker-{a.kind}",
+            anchor_low=a.low,
+            anchor_high=a.high,
+            anchor_label=f"{ANCHOR_NAMES[a.kind]} {a.label}",
+            divider_val=divider_val,
+            step_val=step_val,
+            in_range=in_range,
+            expansions=expansions,
+        ))
+    return results
@@ -0,0 +1,99 @@
+# calc_cache.py
+"""
+Prozessweiter Ergebnis-Cache für die Modelle.
+
+Schlüssel = (Modell, Parameter, Daten-Version des Tickers im data_store).
+Sobald der Speicher neue Kerzen für einen Ticker erhält, ändert sich
+die Version und alte Ergebnisse werden automatisch nicht mehr getroffen.
+"""
+
+import threading
+from collections import OrderedDict
+
+from calculations.calc_memory import estimate_size
+from calculations.calc_timing import timed_stage
+from data.data_store import get_store
+
+
+class ResultCache:
+    """
+    Einfacher thread-sicherer LRU-Cache, begrenzt durch Anzahl Einträge
+    UND geschätzte Größe in Bytes (max_bytes), damit der Speicherbedarf
+    des Servers unabhängig von der Zahl der Nutzer fest bleibt.
+    Die Anzahl ist großzügig bemessen (Watchlist-Dashboard: mehrere
+    Einträge je Ticker), die eigentliche Grenze ist max_bytes.
+    """
+
+    def __init__(self, max_entries=4096, max_bytes=64 * 1024 * 1024):
+        self._max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self.nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._sizes[key]
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.nbytes += size
+            self._entries.move_to_end(key)
+            while len(self._entries) > 1 and (
+                len(self._entries) > self._max_entries or self.nbytes > self.max_bytes
+            ):
+                old_key, _ = self._entries.popitem(last=False)
+                self.nbytes -= self._sizes.pop(old_key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+_result_cache = ResultCache()
+
+
+def get_result_cache():
+    return _result_cache
+
+
+def run_model_cached(model_fn, ticker, **kwargs):
+    """
+    Führt 'model_fn(ticker=..., **kwargs)' aus oder liefert das gecachte
+    Ergebnis. Die Historie wird vorher geladen/aufgefrischt, damit die
+    Daten-Version im Schlüssel zu den tatsächlich genutzten Daten passt.
+    """
+    store = get_store()
+    with timed_stage("get_history"):
+        store.get_history(ticker)
+    key = (model_fn.__name__, ticker, store.version(ticker), tuple(sorted(kwargs.items())))
+
+    result = _result_cache.get(key)
+    if result is not None:
+        print(f"[DEBUG calc_cache] HIT  {model_fn.__name__}({ticker})")
+        return result
+
+    print(f"[DEBUG calc_cache] MISS {model_fn.__name__}({ticker})")
+    with timed_stage(model_fn.__name__):
+        result = model_fn(ticker=ticker, **kwargs)
+    _result_cache.put(key, result)
+    return result
@@ -0,0 +1,227 @@
+# calc_dashboard.py
+"""
+Daten für das Watchlist-Dashboard (ui_dashboard.py).
+
+Je Ticker entsteht EINE flache Tabellenzeile (nur Skalare): Bereich,
+Referenzkurs, nächstes In-Range-Level darunter/darüber je Modell und die
+nächste Expansion. Die Zeile wird selbst im Ergebnis-Cache (calc_cache)
+abgelegt – wie die Modelle mit der Daten-Version im Schlüssel –, so dass
+ein erneutes Öffnen der Watchlist nur noch Cache-Treffer liefert.
+
+Sortieren, Filtern und Blättern arbeiten anschließend nur noch auf dem
+fertigen DataFrame; an die Oberfläche geht immer nur eine Seite.
+"""
+
+import math
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import pandas as pd
+
+from calculations.calc_cache import run_model_cached
+from calculations.calc_pipeline import DEFAULT_PARAMS, run_all_models
+from data.data_store import get_store
+
+# Modelle der Tabelle: (Spaltenpräfix, Index in run_all_models)
+DASHBOARD_MODELS = (("360°", 0), ("VJ", 1), ("VM", 2))
+
+DASHBOARD_COLUMNS = (
+    ["Ticker", "Kurs", "ATR", "Bereich unten", "Bereich oben", "Lage im Bereich %"]
+    + [f"{m} {c}" for m, _ in DASHBOARD_MODELS
+       for c in ("unter Kurs", "über Kurs", "Expansion", "In-Range")]
+    + ["Abstand nächstes Level %", "Fehler"]
+)
+
+# yfinance-Downloads laufen nacheinander (data_store._YF_LOCK): ein Thread
+# lädt, während der zweite mit bereits geladenen Kerzen rechnet. Mehr
+# Threads würden sich nur an der Provider-Sperre anstellen.
+DEFAULT_DASHBOARD_WORKERS = 2
+
+# Intervall, in dem während laufender Zeilen auf Abbruch geprüft wird
+CANCEL_POLL_SECONDS = 0.2
+
+
+def parse_watchlist(text):
+    """
+    Ticker aus Freitext (Komma, Semikolon, Leerzeichen oder Zeilenumbruch),
+    in Großschreibung, ohne Duplikate, Reihenfolge bleibt erhalten.
+    """
+    raw = text.replace(",", " ").replace(";", " ").split()
+    return list(dict.fromkeys(t.strip().upper() for t in raw if t.strip()))
+
+
+def reference_close(ticker, analysis_date):
+    """
+    Schlusskurs der letzten Kerze VOR dem Analysedatum (wie die
+    Vortageskerze der Modelle) oder None.
+    """
+    df = get_store().get_range(ticker, pd.Timestamp(analysis_date) - timedelta(days=14), analysis_date)
+    if df.empty:
+        return None
+    return float(df["Close"].iloc[-1])
+
+
+def nearest_levels(levels, price):
+    """
+    (nächstes Level <= price, nächstes Level > price) aus 'levels'; None,
+    falls es auf einer Seite keines gibt.
+    """
+    below = [lvl for lvl in levels if lvl <= price]
+    above = [lvl for lvl in levels if lvl > price]
+    return (max(below) if below else None), (min(above) if above else None)
+
+
+def _distance_pct(level, price):
+    if level is None or not price:
+        return None
+    return abs(level - price) / price * 100.0
+
+
+def dashboard_row(ticker, analysis_date, params):
+    """
+    Modell-Funktion für run_model_cached: rechnet (bzw. holt aus dem Cache)
+    alle drei Modelle und verdichtet sie zu einer Tabellenzeile.
+    'params' als sortiertes Tupel (hashbar für den Cache-Schlüssel).
+    """
+    results = run_all_models(ticker, analysis_date, dict(params))
+    result_360 = results[0]
+    price = reference_close(ticker, analysis_date)
+
+    row = {
+        "Ticker": ticker,
+        "Kurs": price,
+        "ATR": result_360.atr,
+        "Bereich unten": result_360.lb,
+        "Bereich oben": result_360.ub,
+        "Lage im Bereich %": None,
+        "Fehler": None,
+    }
+    lb, ub = result_360.lb, result_360.ub
+    if price is not None and lb is not None and ub is not None and ub > lb:
+        row["Lage im Bereich %"] = (price - lb) / (ub - lb) * 100.0
+
+    distances = []
+    for prefix, i in DASHBOARD_MODELS:
+        result = results[i]
+        below = above = expansion = None
+        if price is not None:
+            below, above = nearest_levels(result.in_range, price)
+            if result.expansions:
+                expansion = min(result.expansions, key=lambda lvl: abs(lvl - price))
+            distances += [_distance_pct(below, price), _distance_pct(above, price)]
+        row[f"{prefix} unter Kurs"] = below
+        row[f"{prefix} über Kurs"] = above
+        row[f"{prefix} Expansion"] = expansion
+        row[f"{prefix} In-Range"] = len(result.in_range)
+
+    distances = [d for d in distances if d is not None]
+    row["Abstand nächstes Level %"] = min(distances) if distances else None
+    return row
+
+
+def dashboard_row_cached(ticker, analysis_date, params=None):
+    """
+    Tabellenzeile für 'ticker' (Ergebnis-Cache). Fehler (z.B. falsches
+    Kürzel) landen in der Spalte "Fehler", statt die Tabelle abzubrechen.
+    """
+    p = dict(DEFAULT_PARAMS)
+    if params:
+        p.update(params)
+    # Nur Parameter der drei Modelle gehören in den Cache-Schlüssel
+    for key in ("ticker", "anchor_periods", "show_longrange", "start_button"):
+        p.pop(key, None)
+    try:
+        return run_model_cached(dashboard_row, ticker=ticker, analysis_date=analysis_date,
+                                params=tuple(sorted(p.items())))
+    except Exception as e:
+        return {"Ticker": ticker, "Fehler": str(e)}
+
+
+def run_dashboard_job(job, tickers, analysis_date, params=None, rows=None,
+                      max_workers=DEFAULT_DASHBOARD_WORKERS):
+    """
+    Job-Funktion (calc_jobs): rechnet die Zeilen aller Ticker mit wenigen
+    Threads (Downloads selbst laufen nacheinander, überlappen aber mit der
+    Modell-Rechnung für bereits geladene Ticker) und hängt jede fertige
+    Zeile sofort an 'rows' an – die Oberfläche zeigt so schon
+    Teilergebnisse. Ein Schritt je Ticker (job.step).
+
+    Ticker werden erst eingereiht, wenn ein Thread frei ist; vor jedem
+    Einreihen und während laufender Zeilen wird auf Abbruch geprüft. Ein
+    Abbruch beendet den Job sofort, laufende Zeilen rechnen im Hintergrund
+    zu Ende (und landen im Ergebnis-Cache).
+    Gibt das fertige DataFrame zurück.
+    """
+    if rows is None:
+        rows = []
+    pending = iter(tickers)
+    running = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dashboard")
+    try:
+        while True:
+            while len(running) < max_workers:
+                ticker = next(pending, None)
+                if ticker is None:
+                    break
+                job.check_cancelled()
+                running[executor.submit(dashboard_row_cached, ticker, analysis_date, params)] = ticker
+            if not running:
+                break
+            done, _ = wait(running, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            job.check_cancelled()
+            for future in done:
+                rows.append(future.result())
+                job.step(running.pop(future))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return dashboard_frame(rows, tickers)
+
+
+def dashboard_frame(rows, tickers=None):
+    """
+    DataFrame mit festen Spalten aus den Zeilen; mit 'tickers' in der
+    Reihenfolge der Watchlist.
+    """
+    df = pd.DataFrame(list(rows), columns=DASHBOARD_COLUMNS)
+    if tickers is not None and not df.empty:
+        order = {t: i for i, t in enumerate(tickers)}
+        df = df.sort_values("Ticker", key=lambda s: s.map(order), kind="stable")
+    numeric = [c for c in DASHBOARD_COLUMNS if c not in ("Ticker", "Fehler")]
+    df[numeric] = df[numeric].astype("float64")
+    return df.reset_index(drop=True)
+
+
+def filter_dashboard(df, query="", max_distance=None, hide_errors=False,
+                     sort_by=None, ascending=True):
+    """
+    Filtert und sortiert die GANZE Tabelle (nicht nur die angezeigte Seite):
+      query        – Teilstring im Ticker (ohne Groß-/Kleinschreibung)
+      max_distance – nur Ticker mit einem Level höchstens so viele % vom Kurs
+      hide_errors  – Ticker mit Fehler ausblenden
+      sort_by      – Spalte; leere Werte stehen immer am Ende
+    """
+    mask = pd.Series(True, index=df.index)
+    if query:
+        mask &= df["Ticker"].str.contains(query.strip(), case=False, regex=False)
+    if max_distance is not None:
+        mask &= df["Abstand nächstes Level %"] <= max_distance
+    if hide_errors:
+        mask &= df["Fehler"].isna()
+    out = df[mask]
+    if sort_by:
+        out = out.sort_values(sort_by, ascending=ascending, na_position="last", kind="stable")
+    return out
+
+
+def page_count(n_rows, page_size):
+    return max(1, math.ceil(n_rows / page_size))
+
+
+def paginate(df, page, page_size):
+    """
+    Seite 'page' (ab 1) der Tabelle; außerhalb liegende Seiten werden auf
+    die erste bzw. letzte Seite begrenzt.
+    """
+    page = min(max(1, page), page_count(len(df), page_size))
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
@@ -0,0 +1,34 @@
+# calc_downsample.py
+
+import numpy as np
+import pandas as pd
+
+
+def downsample_ohlc(df, max_buckets):
+    """
+    Verdichtet OHLC-Kerzen auf höchstens 'max_buckets' Eimer
+    (z.B. einen pro Pixel Chartbreite):
+      Open = erster Open, High = max High, Low = min Low, Close = letzter Close.
+    Der Index ist jeweils das Datum der ersten Kerze im Eimer.
+    Bei weniger Kerzen als Eimern wird unverändert zurückgegeben.
+    """
+    df = df[['Open', 'High', 'Low', 'Close']]
+    n = len(df)
+    if n <= max_buckets or max_buckets < 1:
+        return df
+
+    # Eimer-Grenzen gleichmäßig über die Kerzen verteilen
+    starts = (np.arange(max_buckets) * n) // max_buckets
+    ends = np.append(starts[1:], n) - 1
+
+    high = df['High'].to_numpy()
+    low = df['Low'].to_numpy()
+    return pd.DataFrame(
+        {
+            'Open': df['Open'].to_numpy()[starts],
+            'High': np.maximum.reduceat(high, starts),
+            'Low': np.minimum.reduceat(low, starts),
+            'Close': df['Close'].to_numpy()[ends],
+        },
+        index=df.index[starts],
+    )
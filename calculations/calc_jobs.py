@@ -0,0 +1,200 @@
+# calc_jobs.py
+"""
+Modell-Läufe im Hintergrund statt im Streamlit-Skript-Thread.
+
+Ein ModelJob wird in einen prozessweiten Thread-Pool (JobRunner)
+gestellt. Die Job-Funktion meldet ihren Fortschritt stufenweise
+(job.start_stage) und prüft dabei, ob der Job abgebrochen wurde
+(kooperativer Abbruch: zwischen zwei Stufen, eine laufende Stufe wie ein
+Download wird noch zu Ende gerechnet). Ein abgebrochener Job, der noch
+in der Warteschlange steht, belegt gar keinen Worker mehr.
+
+Die Seite bleibt dadurch bedienbar; eine neue Eingabe bricht den alten,
+nicht mehr benötigten Lauf ab (siehe app.py).
+
+Verlassene Sessions: die Oberfläche meldet sich beim Abfragen des
+Fortschritts (job.touch). Fragt niemand mehr nach (Tab geschlossen),
+bricht sich der Job nach ABANDON_SECONDS selbst ab und gibt den Worker frei.
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MODEL_WORKERS = 4
+
+# Sekunden ohne Abfrage durch die Oberfläche, nach denen ein Job als verlassen gilt
+ABANDON_SECONDS = 30.0
+
+
+class JobCancelled(Exception):
+    """
+    Wird in der Job-Funktion ausgelöst, sobald der Job abgebrochen wurde.
+    """
+
+
+class ModelJob:
+    """
+    Zustand eines Hintergrund-Laufs.
+
+    key:    Eingaben, für die gerechnet wird (zum Vergleich mit neuen Eingaben)
+    stages: Namen der Stufen in Reihenfolge (für die Fortschrittsanzeige)
+    status: "wartend", "läuft", "fertig", "abgebrochen" oder "fehler"
+    result / error: Ergebnis der Job-Funktion bzw. deren Exception
+    """
+
+    def __init__(self, key, stages, abandon_after=ABANDON_SECONDS):
+        self.id = uuid.uuid4().hex[:8]
+        self.key = key
+        self.stages = list(stages)
+        self.status = "wartend"
+        self.stage = None
+        self.stage_index = 0
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.abandon_after = abandon_after
+        self.last_seen = self.submitted_at
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Aufrufe aus der Job-Funktion (Worker-Thread)
+    # ------------------------------------------------------------------
+    def start_stage(self, stage):
+        """
+        Nächste Stufe beginnen; wirft JobCancelled, falls abgebrochen.
+        """
+        self.check_cancelled()
+        if stage in self.stages:
+            self.stage_index = self.stages.index(stage)
+        self.stage = stage
+        print(f"[DEBUG calc_jobs] Job {self.id}: {stage}")
+
+    def step(self, label=None):
+        """
+        Für Jobs aus vielen gleichartigen Schritten (z.B. ein Ticker je
+        Schritt, calc_dashboard): einen Schritt als erledigt zählen.
+        Wirft JobCancelled, falls abgebrochen.
+        """
+        self.check_cancelled()
+        self.stage_index += 1
+        self.stage = label
+
+    def check_cancelled(self):
+        if (self.abandon_after is not None and not self._cancel.is_set()
+                and time.time() - self.last_seen > self.abandon_after):
+            print(f"[DEBUG calc_jobs] Job {self.id} verlassen (keine Abfrage seit {self.abandon_after:g}s)")
+            self._cancel.set()
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.id} abgebrochen")
+
+    # ------------------------------------------------------------------
+    # Aufrufe aus der Oberfläche
+    # ------------------------------------------------------------------
+    def touch(self):
+        """
+        Lebenszeichen der Oberfläche (Fortschrittsanzeige / Ergebnisabruf).
+        """
+        self.last_seen = time.time()
+
+    def cancel(self):
+        if not self.done:
+            self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Wartet höchstens 'timeout' Sekunden auf das Ende; True, falls fertig.
+        """
+        return self._done.wait(timeout)
+
+    @property
+    def progress(self):
+        """
+        Fortschritt 0.0 - 1.0 (abgeschlossene Stufen / alle Stufen).
+        """
+        if self.status == "fertig":
+            return 1.0
+        if not self.stages:
+            return 0.0
+        return self.stage_index / len(self.stages)
+
+    def _finish(self, status, result=None, error=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self._done.set()
+
+    def __repr__(self):
+        return f"ModelJob({self.id}, {self.status}, stage={self.stage})"
+
+
+class JobRunner:
+    """
+    Thread-Pool für ModelJobs (von allen Sessions geteilt).
+    """
+
+    def __init__(self, max_workers=DEFAULT_MODEL_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-job")
+        self.max_workers = max_workers
+
+    def submit(self, key, stages, fn, *args, abandon_after=ABANDON_SECONDS, **kwargs):
+        """
+        Stellt fn(job, *args, **kwargs) in den Pool und gibt den ModelJob zurück.
+        abandon_after=None => Job wird nie als verlassen abgebrochen.
+        """
+        job = ModelJob(key, stages, abandon_after=abandon_after)
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    @staticmethod
+    def _run(job, fn, args, kwargs):
+        try:
+            job.check_cancelled()
+        except JobCancelled:
+            pass
+        if job.cancelled:
+            # Schon in der Warteschlange überholt => Worker sofort wieder frei
+            job._finish("abgebrochen")
+            return
+        job.status = "läuft"
+        try:
+            result = fn(job, *args, **kwargs)
+        except JobCancelled:
+            print(f"[DEBUG calc_jobs] Job {job.id} abgebrochen (Stufe {job.stage})")
+            job._finish("abgebrochen")
+        except Exception as e:
+            job._finish("fehler", error=e)
+        else:
+            job._finish("fertig", result=result)
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_job_runner = None
+_job_runner_lock = threading.Lock()
+
+
+def get_job_runner():
+    """
+    Prozessweiter JobRunner; Anzahl Worker über MODEL_WORKERS (Standard 4).
+    """
+    global _job_runner
+    with _job_runner_lock:
+        if _job_runner is None:
+            workers = int(os.environ.get("MODEL_WORKERS", DEFAULT_MODEL_WORKERS))
+            _job_runner = JobRunner(max_workers=workers)
+        return _job_runner
@@ -0,0 +1,71 @@
+# calc_memory.py
+"""
+Speicher-Abschätzung für Sessions und gemeinsame Caches.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+def estimate_size(obj, _seen=None):
+    """
+    Grobe, aber tiefe Größenabschätzung in Bytes:
+    DataFrames/Series über memory_usage(deep=True), NumPy über nbytes,
+    Container & Objekte mit __slots__ rekursiv. Gemeinsam referenzierte
+    Objekte werden nur einmal gezählt.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(x, _seen) for x in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(estimate_size(getattr(obj, s, None), _seen) for s in obj.__slots__)
+    elif hasattr(obj, "__dict__"):
+        size += estimate_size(vars(obj), _seen)
+    return size
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024.0
+
+
+def memory_report(session_state):
+    """
+    Speicherbericht: Session-eigene Objekte (je Schlüssel) sowie die von
+    allen Sessions geteilten Caches (data_store, Ergebnis-Cache).
+    """
+    from calculations.calc_cache import get_result_cache
+    from data.data_store import get_store
+
+    session = {str(k): estimate_size(v) for k, v in dict(session_state).items()}
+    store = get_store()
+    cache = get_result_cache()
+    return {
+        "session_bytes": sum(session.values()),
+        "session_keys": dict(sorted(session.items(), key=lambda kv: -kv[1])),
+        "store_bytes": store.memory_usage(),
+        "store_tickers": len(store.tickers()),
+        "store_budget": store.max_bytes,
+        "result_cache_bytes": cache.nbytes,
+        "result_cache_entries": len(cache),
+        "result_cache_budget": cache.max_bytes,
+    }
@@ -0,0 +1,180 @@
+# calc_panel.py
+"""
+Panel-Kernels für das Screening vieler Ticker auf einmal.
+
+Statt je Ticker ein DataFrame durch calculate_atr / find_extreme_day zu
+schicken, werden alle Ticker als 2D-Arrays (Ticker x Kerzen) gestapelt
+und True Range, gleitende ATR und die Extrem-Kerze der letzten 3 Kerzen
+in einem NumPy-Durchlauf berechnet.
+
+Die Ergebnisse stimmen exakt (bitgleich) mit den Einzel-Funktionen
+überein, solange jeder Ticker dieselben Kerzen enthält, die auch die
+Einzel-Funktion bekommt:
+  - Ticker werden rechtsbündig gestapelt (letzte Kerze in der letzten
+    Spalte), kürzere Historien links mit NaN aufgefüllt.
+  - Die gleitende ATR bildet den Algorithmus von pandas
+    'rolling(window).mean()' nach (laufende Summe mit Kahan-Kompensation
+    getrennt für Hinzufügen/Entfernen), vektorisiert über alle Ticker.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def stack_panel(frames, tickers=None):
+    """
+    frames: dict ticker -> DataFrame (Date-Index, Spalten Open/High/Low/Close)
+    Gibt ein dict zurück:
+      tickers  – Liste der Ticker (Zeilenreihenfolge)
+      dates    – (T x N) datetime64[ns], NaT in der Auffüllung
+      open, high, low, close – (T x N) float64, NaN in der Auffüllung
+      lengths  – (T,) Anzahl echter Kerzen je Ticker
+    """
+    tickers = list(tickers if tickers is not None else frames)
+    lengths = np.array([len(frames[t]) for t in tickers], dtype=np.int64)
+    n_bars = int(lengths.max()) if len(tickers) else 0
+
+    panel = {
+        "tickers": tickers,
+        "dates": np.full((len(tickers), n_bars), np.datetime64("NaT"), dtype="datetime64[ns]"),
+        "lengths": lengths,
+    }
+    for col in ("Open", "High", "Low", "Close"):
+        panel[col.lower()] = np.full((len(tickers), n_bars), np.nan, dtype=np.float64)
+
+    for row, t in enumerate(tickers):
+        df = frames[t]
+        n = len(df)
+        if n == 0:
+            continue
+        panel["dates"][row, n_bars - n:] = df.index.values.astype("datetime64[ns]")
+        for col in ("Open", "High", "Low", "Close"):
+            panel[col.lower()][row, n_bars - n:] = df[col].to_numpy(dtype=np.float64)
+    return panel
+
+
+def panel_true_range(high, low, close):
+    """
+    True Range je Kerze (T x N), wie calculate_atr:
+    max(H-L, |H-Vortagesschluss|, |L-Vortagesschluss|), NaN-Werte
+    werden übersprungen (erste Kerze => H-L).
+    """
+    prev_close = np.empty_like(close)
+    prev_close[:, 0] = np.nan
+    prev_close[:, 1:] = close[:, :-1]
+
+    h_l = high - low
+    h_pc = np.abs(high - prev_close)
+    l_pc = np.abs(low - prev_close)
+    return np.fmax(np.fmax(h_l, h_pc), l_pc)
+
+
+def panel_rolling_atr(tr, period=14):
+    """
+    Gleitender Mittelwert über 'period' Kerzen je Zeile (T x N),
+    identisch zu pandas Series.rolling(window=period).mean().
+    Schleife über die Kerzen, vektorisiert über alle Ticker.
+    """
+    n_tickers, n_bars = tr.shape
+    out = np.full((n_tickers, n_bars), np.nan, dtype=np.float64)
+    if n_bars == 0:
+        return out
+
+    nobs = np.zeros(n_tickers, dtype=np.int64)
+    sum_x = np.zeros(n_tickers, dtype=np.float64)
+    comp_add = np.zeros(n_tickers, dtype=np.float64)
+    comp_remove = np.zeros(n_tickers, dtype=np.float64)
+    neg_ct = np.zeros(n_tickers, dtype=np.int64)
+    same_ct = np.zeros(n_tickers, dtype=np.int64)
+    prev_value = tr[:, 0].copy()
+
+    def add(val):
+        ok = ~np.isnan(val)
+        y = np.where(ok, val - comp_add, 0.0)
+        t = sum_x + y
+        comp_add[:] = np.where(ok, t - sum_x - y, comp_add)
+        sum_x[:] = np.where(ok, t, sum_x)
+        nobs[:] += ok
+        neg_ct[:] += ok & np.signbit(val)
+        same = ok & (val == prev_value)
+        same_ct[:] = np.where(same, same_ct + 1, np.where(ok, 1, same_ct))
+        prev_value[:] = np.where(ok, val, prev_value)
+
+    def remove(val):
+        ok = ~np.isnan(val)
+        y = np.where(ok, -val - comp_remove, 0.0)
+        t = sum_x + y
+        comp_remove[:] = np.where(ok, t - sum_x - y, comp_remove)
+        sum_x[:] = np.where(ok, t, sum_x)
+        nobs[:] -= ok
+        neg_ct[:] -= ok & np.signbit(val)
+
+    for i in range(n_bars):
+        if period == 1:
+            # Fenster der Länge 1 => pandas beginnt jedes Fenster neu
+            nobs[:] = 0
+            sum_x[:] = 0.0
+            comp_add[:] = 0.0
+            comp_remove[:] = 0.0
+            neg_ct[:] = 0
+            same_ct[:] = 0
+            prev_value[:] = tr[:, i]
+        elif i >= period:
+            remove(tr[:, i - period])
+        add(tr[:, i])
+
+        valid = (nobs >= period) & (nobs > 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = sum_x / nobs
+        result = np.where(same_ct >= nobs, prev_value,
+                          np.where((neg_ct == 0) & (result < 0), 0.0,
+                                   np.where((neg_ct == nobs) & (result > 0), 0.0, result)))
+        out[:, i] = np.where(valid, result, np.nan)
+    return out
+
+
+def panel_extreme_3bars(high, low, lengths, mode):
+    """
+    Spaltenindex der Extrem-Kerze unter den letzten 3 Kerzen je Ticker,
+    wie find_extreme_day: höchstes High (mode='hoch') bzw. tiefstes Low,
+    bei Gleichstand die erste. -1 bei weniger als 3 Kerzen.
+    """
+    n_bars = high.shape[1]
+    if n_bars < 3:
+        return np.full(high.shape[0], -1, dtype=np.int64)
+
+    if mode == "hoch":
+        cands = np.where(np.isnan(high[:, -3:]), -np.inf, high[:, -3:])
+        pos = np.argmax(cands, axis=1)
+    else:
+        cands = np.where(np.isnan(low[:, -3:]), np.inf, low[:, -3:])
+        pos = np.argmin(cands, axis=1)
+    return np.where(lengths >= 3, n_bars - 3 + pos, -1)
+
+
+def screen_panel(frames, mode_choice, atr_period=14, tickers=None):
+    """
+    Screening über viele Ticker in einem Durchlauf: je Ticker die
+    letzte ATR sowie Datum/High/Low der Extrem-Kerze (letzte 3 Kerzen).
+    'frames' sollten bereits bis zum Vortag geschnitten sein (wie df_cut
+    in den Modellen). Gibt ein DataFrame mit einer Zeile je Ticker zurück.
+    """
+    panel = stack_panel(frames, tickers)
+    tr = panel_true_range(panel["high"], panel["low"], panel["close"])
+    atr = panel_rolling_atr(tr, int(atr_period))
+    pos = panel_extreme_3bars(panel["high"], panel["low"], panel["lengths"], mode_choice)
+
+    rows = np.arange(len(panel["tickers"]))
+    has_extreme = pos >= 0
+    safe_pos = np.where(has_extreme, pos, 0)
+
+    last_atr = atr[:, -1] if atr.shape[1] else np.full(len(rows), np.nan)
+    return pd.DataFrame(
+        {
+            "extreme_date": np.where(has_extreme, panel["dates"][rows, safe_pos], np.datetime64("NaT")),
+            "extreme_high": np.where(has_extreme, panel["high"][rows, safe_pos], np.nan),
+            "extreme_low": np.where(has_extreme, panel["low"][rows, safe_pos], np.nan),
+            "atr": last_atr,
+        },
+        index=pd.Index(panel["tickers"], name="Ticker"),
+    )
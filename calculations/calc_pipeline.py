@@ -0,0 +1,236 @@
+# calc_pipeline.py
+
+from calculations.calc_360 import run_360_model
+from calculations.calc_vormonat_vorjahr_fix import run_vorjahr_model, run_vormonat_model
+from calculations.calc_cache import run_model_cached
+from calculations.calc_anchors import run_anchor_models
+from calculations.calc_timing import timed_stage
+from data.data_store import get_store
+
+# Standardwerte der Sidebar (ui_sidebar.py) – zentral, damit Report-Generator
+# & Co. mit denselben Parametern rechnen wie die App.
+DEFAULT_PARAMS = {
+    "ticker": "BTC-USD",
+    "mode_choice": "hoch",
+    "volatility": "normal",
+    "atr_period": 14,
+    "vj_divider": 16,
+    "vm_divider": 16,
+    "big_rhythm": "360",
+    "small_div": 45.0,
+    "anchor_periods": 0,
+}
+
+DATA_BUFFER = 2000  # ca. 5 Jahre
+
+
+def run_all_models(ticker, analysis_date, params=None, data_buffer=DATA_BUFFER):
+    """
+    Führt 360°-, Vorjahr- und Vormonat-Modell nacheinander aus.
+    'params' überschreibt einzelne Werte aus DEFAULT_PARAMS.
+    Gibt (result_360, result_vorjahr, result_vormonat) zurück.
+    """
+    p = dict(DEFAULT_PARAMS)
+    if params:
+        p.update(params)
+
+    result_360 = run_model_cached(
+        run_360_model,
+        ticker=ticker,
+        analysis_date=analysis_date,
+        mode_choice=p["mode_choice"],
+        volatility_choice=p["volatility"],
+        main_rhythm=p["big_rhythm"],
+        selected_small_div=p["small_div"],
+        atr_period=p["atr_period"],
+        data_buffer=data_buffer
+    )
+    result_vorjahr = run_model_cached(
+        run_vorjahr_model,
+        ticker=ticker,
+        analysis_date=analysis_date,
+        mode_choice=p["mode_choice"],
+        divider_val=p["vj_divider"],
+        vol_sel=p["volatility"],
+        atr_period=p["atr_period"],
+        databuf=data_buffer
+    )
+    result_vormonat = run_model_cached(
+        run_vormonat_model,
+        ticker=ticker,
+        analysis_date=analysis_date,
+        mode_choice=p["mode_choice"],
+        divider_val=p["vm_divider"],
+        vol_choice=p["volatility"],
+        atr_period=p["atr_period"],
+        databuf=data_buffer
+    )
+    return result_360, result_vorjahr, result_vormonat
+
+
+def run_360_for_divider(inputs, small_div, data_buffer=DATA_BUFFER):
+    """
+    360°-Modell für die abgeschickten Sidebar-Eingaben, aber mit anderem
+    kleinen Teiler. Der Bereich (compute_360_range) kommt aus dem Cache,
+    neu gerechnet wird nur das Raster.
+    """
+    return run_model_cached(
+        run_360_model,
+        ticker=inputs["ticker"],
+        analysis_date=inputs["analysis_date"],
+        mode_choice=inputs["mode_choice"],
+        volatility_choice=inputs["volatility"],
+        main_rhythm=inputs["big_rhythm"],
+        selected_small_div=small_div,
+        atr_period=inputs["atr_period"],
+        data_buffer=data_buffer
+    )
+
+
+def model_stages(anchor_periods=0):
+    """
+    Stufen eines App-Laufs (für die Fortschrittsanzeige).
+    """
+    stages = ["Kursdaten laden", "360°-Modell", "Vorjahr-Modell", "Vormonat-Modell"]
+    if anchor_periods > 0:
+        stages.append("Weitere Anker")
+    return stages
+
+
+def run_models_job(job, ticker, analysis_date, mode_choice, volatility, atr_period,
+                   big_rhythm, small_div, vj_divider, vm_divider, anchor_periods=0,
+                   data_buffer=DATA_BUFFER):
+    """
+    Job-Funktion (calc_jobs) für die App: lädt die Kursdaten und rechnet
+    die Modelle Stufe für Stufe; zwischen den Stufen wird ein Abbruch
+    geprüft. Gibt ein dict mit den Ergebnissen und der Daten-Version
+    zurück.
+    """
+    with timed_stage("models"):
+        job.start_stage("Kursdaten laden")
+        store = get_store()
+        store.get_history(ticker)
+        # Stand der Kursdaten, auf dem die Ergebnisse beruhen (app.py
+        # rechnet neu, sobald der Speicher neuere Daten hat)
+        data_version = store.version(ticker)
+
+        job.start_stage("360°-Modell")
+        result_360 = run_model_cached(
+            run_360_model,
+            ticker=ticker,
+            analysis_date=analysis_date,
+            mode_choice=mode_choice,
+            volatility_choice=volatility,
+            main_rhythm=big_rhythm,
+            selected_small_div=small_div,
+            atr_period=atr_period,
+            data_buffer=data_buffer
+        )
+
+        job.start_stage("Vorjahr-Modell")
+        result_vorjahr = run_model_cached(
+            run_vorjahr_model,
+            ticker=ticker,
+            analysis_date=analysis_date,
+            mode_choice=mode_choice,
+            divider_val=vj_divider,
+            vol_sel=volatility,
+            atr_period=atr_period,
+            databuf=data_buffer
+        )
+
+        job.start_stage("Vormonat-Modell")
+        result_vormonat = run_model_cached(
+            run_vormonat_model,
+            ticker=ticker,
+            analysis_date=analysis_date,
+            mode_choice=mode_choice,
+            divider_val=vm_divider,
+            vol_choice=volatility,
+            atr_period=atr_period,
+            databuf=data_buffer
+        )
+
+        anchor_results = None
+        if anchor_periods > 0:
+            job.start_stage("Weitere Anker")
+            anchor_results = run_model_cached(
+                run_anchor_models,
+                ticker=ticker,
+                analysis_date=analysis_date,
+                mode_choice=mode_choice,
+                volatility_choice=volatility,
+                atr_period=atr_period,
+                data_buffer=data_buffer,
+                year_divider=vj_divider,
+                month_divider=vm_divider,
+                n_years=anchor_periods,
+                n_quarters=anchor_periods,
+                n_months=anchor_periods,
+                n_weeks=anchor_periods
+            )
+        job.check_cancelled()
+
+    return {
+        "result_360": result_360,
+        "result_vorjahr": result_vorjahr,
+        "result_vormonat": result_vormonat,
+        "anchor_results": anchor_results,
+        "data_version": data_version,
+    }
+
+
+def build_display_data(result_360, result_vorjahr, result_vormonat, analysis_date, mode_choice):
+    """
+    Fasst die drei Modell-Ergebnisse zu (basisdaten, ergebnisse) zusammen,
+    so wie sie display_results() und der Report-Generator erwarten.
+    """
+    # Basisdaten für die Anzeige (aus 360°-Ergebnis)
+    basisdaten = {
+        "analysis_date": analysis_date,
+        "vortageskerze": result_360.extreme_date if result_360.extreme_date is not None else "n/a",
+        "atr_value": result_360.atr,
+        "range_unten": result_360.lb,
+        "range_oben": result_360.ub,
+        "mode_choice": mode_choice
+    }
+
+    # Chart-Daten (OHLC-Kerzen aus dem 360°-Ergebnis)
+    df_chart = result_360.chart_frame()
+    if df_chart is not None and not df_chart.empty:
+        df_chart = df_chart.tail(10)
+    else:
+        df_chart = None
+
+    ergebnisse = {
+        # 360°
+        "preise_inrange_360": result_360.in_range,
+        "preise_ausserhalb_360": result_360.expansions,
+        # Vorjahr
+        "preise_inrange_vorjahr": result_vorjahr.in_range,
+        "preise_ausserhalb_vorjahr": result_vorjahr.expansions,
+        # Vormonat
+        "preise_inrange_vormonat": result_vormonat.in_range,
+        "preise_ausserhalb_vormonat": result_vormonat.expansions,
+        # Chart
+        "df_chart": df_chart,
+        # Datencheck
+        "vj_high": result_vorjahr.anchor_high,
+        "vj_low": result_vorjahr.anchor_low,
+        "vj_range": None,
+        "vj_teiler": result_vorjahr.divider_val,
+        "vj_schritt": result_vorjahr.step_val,
+        "vm_high": result_vormonat.anchor_high,
+        "vm_low": result_vormonat.anchor_low,
+        "vm_range": None,
+        "vm_teiler": result_vormonat.divider_val,
+        "vm_schritt": result_vormonat.step_val
+    }
+
+    # Range-Berechnungen (Vorjahr & Vormonat)
+    if ergebnisse["vj_high"] is not None and ergebnisse["vj_low"] is not None:
+        ergebnisse["vj_range"] = ergebnisse["vj_high"] - ergebnisse["vj_low"]
+    if ergebnisse["vm_high"] is not None and ergebnisse["vm_low"] is not None:
+        ergebnisse["vm_range"] = ergebnisse["vm_high"] - ergebnisse["vm_low"]
+
+    return basisdaten, ergebnisse
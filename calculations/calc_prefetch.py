@@ -0,0 +1,163 @@
+# calc_prefetch.py
+"""
+Hintergrund-Prefetch: lädt für eine Watchlist regelmäßig die neuen
+Kerzen in den data_store und rechnet die drei Modelle mit den
+Standardparametern der Sidebar vor (calc_cache), damit die erste
+interaktive Anfrage des Tages direkt aus dem Cache bedient wird.
+
+Zeitplan:
+  - Aktien & Co.: an Handelstagen (Mo-Fr) zu festen Uhrzeiten,
+    standardmäßig nach Handelsschluss und vor Handelsbeginn.
+  - Krypto (z.B. BTC-USD): rund um die Uhr in festem Intervall.
+
+Uhr ('clock') und Warte-Funktion sind austauschbar, so dass sich der
+Scheduler mit einer Fake-Uhr und einem HistoryStore mit
+LocalCsvProvider ohne Netz testen lässt.
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta, time as dtime
+
+from calculations.calc_pipeline import run_all_models
+from data.data_store import get_store
+from data.data_ingest import is_crypto
+
+# Standard-Zeitplan (lokale Serverzeit)
+DEFAULT_EQUITY_TIMES = ("22:30", "08:00")
+DEFAULT_MARKET_CLOSE = "22:00"
+DEFAULT_CRYPTO_INTERVAL = 60 * 60  # Sekunden
+
+
+def _parse_time(hhmm):
+    h, m = hhmm.split(":")
+    return dtime(int(h), int(m))
+
+
+class PrefetchScheduler:
+    """
+    watchlist:       Liste von Tickern
+    params:          Modell-Parameter (Standard: DEFAULT_PARAMS der Sidebar)
+    equity_times:    Uhrzeiten 'HH:MM' für Nicht-Krypto an Handelstagen
+    market_close:    'HH:MM' – danach gilt der nächste Handelstag als Analysedatum
+    crypto_interval: Sekunden zwischen zwei Läufen für Krypto-Ticker
+    clock:           liefert ein datetime 'jetzt'
+    """
+
+    def __init__(self, watchlist, params=None,
+                 equity_times=DEFAULT_EQUITY_TIMES,
+                 market_close=DEFAULT_MARKET_CLOSE,
+                 crypto_interval=DEFAULT_CRYPTO_INTERVAL,
+                 clock=datetime.now):
+        self.watchlist = list(watchlist)
+        self.params = params
+        self.equity_times = sorted(_parse_time(t) for t in equity_times)
+        self.market_close = _parse_time(market_close)
+        self.crypto_interval = crypto_interval
+        self.clock = clock
+
+        # Beim Start sofort einmal alles vorwärmen
+        now = self.clock()
+        self.next_run = {t: now for t in self.watchlist}
+        self.last_error = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Zeitplan
+    # ------------------------------------------------------------------
+    def next_run_after(self, ticker, now):
+        """
+        Nächster geplanter Zeitpunkt (> now) für 'ticker'.
+        """
+        if is_crypto(ticker):
+            return now + timedelta(seconds=self.crypto_interval)
+
+        day = now.date()
+        for _ in range(8):
+            if day.weekday() < 5:
+                for t in self.equity_times:
+                    candidate = datetime.combine(day, t, tzinfo=now.tzinfo)
+                    if candidate > now:
+                        return candidate
+            day += timedelta(days=1)
+        raise RuntimeError("Kein Termin im Zeitplan gefunden.")
+
+    def analysis_date_for(self, ticker, now):
+        """
+        Analysedatum, für das vorgerechnet wird: Krypto => heute;
+        sonst der nächste Handelstag (nach Handelsschluss => ab morgen).
+        """
+        day = now.date()
+        if is_crypto(ticker):
+            return day
+        if now.time() >= self.market_close:
+            day += timedelta(days=1)
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+        return day
+
+    def due_tickers(self, now=None):
+        now = now or self.clock()
+        return [t for t in self.watchlist if self.next_run[t] <= now]
+
+    # ------------------------------------------------------------------
+    # Ausführung
+    # ------------------------------------------------------------------
+    def prefetch(self, ticker, analysis_date):
+        """
+        Neue Kerzen holen und alle Modelle vorrechnen (landet im Ergebnis-Cache).
+        """
+        print(f"[DEBUG calc_prefetch] prefetch({ticker}, {analysis_date})")
+        get_store().refresh(ticker)
+        run_all_models(ticker, analysis_date, self.params)
+
+    def run_pending(self):
+        """
+        Führt alle fälligen Prefetches aus und plant sie neu.
+        Gibt die Liste der bearbeiteten Ticker zurück.
+        """
+        now = self.clock()
+        done = []
+        for ticker in self.due_tickers(now):
+            try:
+                self.prefetch(ticker, self.analysis_date_for(ticker, now))
+                self.last_error.pop(ticker, None)
+            except Exception as e:
+                # Ein fehlerhafter Ticker darf die anderen nicht blockieren
+                print(f"[DEBUG calc_prefetch] Fehler bei {ticker}: {e}")
+                self.last_error[ticker] = str(e)
+            self.next_run[ticker] = self.next_run_after(ticker, now)
+            done.append(ticker)
+        return done
+
+    def _loop(self, poll_seconds):
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(poll_seconds)
+
+    def start(self, poll_seconds=30):
+        """
+        Startet den Scheduler als Daemon-Thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(poll_seconds,),
+                                        name="prefetch-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def watchlist_from_env():
+    """
+    Watchlist aus der Umgebungsvariable PREFETCH_WATCHLIST
+    (kommagetrennt). Prefetch ist opt-in: ohne Variable ist die
+    Watchlist leer (kein Scheduler, keine Downloads im Hintergrund).
+    """
+    raw = os.environ.get("PREFETCH_WATCHLIST", "")
+    return [t.strip() for t in raw.split(",") if t.strip()]
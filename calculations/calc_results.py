@@ -0,0 +1,77 @@
+# calc_results.py
+"""
+Kompakte Ergebnis-Objekte der Modelle.
+
+Statt großer dicts mit DataFrames (df_cut, df_vj, ATR-Kopien) und
+Plotly-Figuren enthalten die Ergebnisse nur noch Skalare und kurze
+Listen. Von den Chart-Kerzen wird nur der kurze OHLC-Ausschnitt (die
+letzten 10 Kerzen) kopiert – so zeigt ein Ergebnis immer die Kerzen,
+mit denen es gerechnet wurde, auch nach einem Refresh oder nachdem der
+data_store den Ticker verdrängt hat (kein erneuter Download).
+"""
+
+
+class ModelResult:
+    """
+    Ergebnis eines Modells (360°, Vorjahr, Vormonat).
+
+    model          – "360", "vorjahr", "vormonat" (bzw. "360-range" für Stufe 1)
+    lb, ub         – ATR-Range
+    basis, atr     – Mittelpunkt der Extrem-Kerze, ATR
+    extreme_date   – Datum der Extrem-Kerze
+    in_range       – Level innerhalb [lb, ub], absteigend
+    expansions     – 4 Level außerhalb der Range
+    anchor_low/high, anchor_label – Hoch/Tief des Ankerzeitraums (Vorjahr/Vormonat)
+    divider_val, step_val – Teiler und Schrittweite der Anker-Reihe
+    chart_bars     – OHLC-Kerzen für den Chart (kleine Kopie, s.o.)
+    """
+
+    __slots__ = (
+        "model", "ticker", "analysis_date",
+        "lb", "ub", "basis", "atr", "extreme_date",
+        "in_range", "expansions",
+        "anchor_low", "anchor_high", "anchor_label",
+        "divider_val", "step_val",
+        "chart_bars",
+    )
+
+    def __init__(self, model, ticker, analysis_date, **fields):
+        for name in self.__slots__:
+            setattr(self, name, None)
+        self.model = model
+        self.ticker = ticker
+        self.analysis_date = analysis_date
+        self.in_range = []
+        self.expansions = []
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def replace(self, **fields):
+        """
+        Kopie mit geänderten Feldern (Ergebnisse im Cache bleiben unverändert).
+        """
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(fields)
+        model = values.pop("model")
+        ticker = values.pop("ticker")
+        analysis_date = values.pop("analysis_date")
+        return ModelResult(model, ticker, analysis_date, **values)
+
+    def set_chart_span(self, df_chart):
+        """
+        Merkt sich die OHLC-Spalten der Chart-Kerzen (Kopie, nur wenige Zeilen).
+        """
+        if df_chart is not None and not df_chart.empty:
+            self.chart_bars = df_chart[['Open', 'High', 'Low', 'Close']].copy()
+
+    def chart_frame(self):
+        """
+        OHLC-Kerzen für den Chart, ohne Zugriff auf den data_store.
+        None, falls keine Kerzen gesetzt sind.
+        """
+        return self.chart_bars
+
+    def __repr__(self):
+        return (f"ModelResult({self.model}, {self.ticker}, {self.analysis_date}, "
+                f"lb={self.lb}, ub={self.ub}, atr={self.atr}, "
+                f"in_range={len(self.in_range)}, expansions={len(self.expansions)})")
@@ -0,0 +1,74 @@
+# calc_timing.py
+"""
+Laufzeit-Messung je Stufe (Daten laden, Modelle, Darstellung).
+
+Jede Stufe wird mit 'with timed_stage("name"):' umschlossen; die Dauer
+landet in einem prozessweiten, thread-sicheren Puffer. Der Puffer ist
+begrenzt (max_samples je Stufe), damit ein lang laufender Server nicht
+wächst. Ausgewertet wird er vom Lasttest (loadtest/load_test.py).
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class StageTimer:
+    """
+    Sammelt Dauern (Sekunden) je Stufe.
+    """
+
+    def __init__(self, max_samples=10000):
+        self._max_samples = max_samples
+        self._samples = defaultdict(lambda: deque(maxlen=self._max_samples))
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self._samples[stage].append(seconds)
+
+    def snapshot(self):
+        """
+        Kopie aller Messwerte: {stage: [sekunden, ...]}
+        """
+        with self._lock:
+            return {stage: list(values) for stage, values in self._samples.items()}
+
+    def summary(self, percentiles=(50, 95, 99)):
+        """
+        Kennzahlen je Stufe: Anzahl, Mittelwert und Perzentile (Millisekunden).
+        """
+        rows = {}
+        for stage, values in self.snapshot().items():
+            arr = np.asarray(values) * 1000.0
+            row = {"count": len(arr), "mean_ms": float(arr.mean())}
+            for p in percentiles:
+                row[f"p{p}_ms"] = float(np.percentile(arr, p))
+            rows[stage] = row
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+_stage_timer = StageTimer()
+
+
+def get_stage_timer():
+    return _stage_timer
+
+
+@contextmanager
+def timed_stage(stage):
+    """
+    Misst die Dauer des umschlossenen Blocks (auch bei Exceptions).
+    """
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_timer.record(stage, time.perf_counter() - t0)
@@ -1,10 +1,12 @@
 # calculations/calc_vormonat_vorjahr_fix.py
 
-import yfinance as yf
 import math
 from datetime import date, timedelta
 import pandas as pd
-import plotly.graph_objects as go
+
+from data.data_store import get_store
+from calculations.calc_results import ModelResult
+from calculations.calc_anchors import previous_anchor, build_anchor_levels
 
 def calculate_atr(df, period=14):
     df = df.copy()
@@ -30,82 +32,22 @@ def find_extreme_3days(df, mode):
         row = row.iloc[0]
     return idx, row
 
-def plot_chart(df_plot, highlights, lb, ub):
-    fig = go.Figure()
-    fig.add_trace(go.Candlestick(
-        x=df_plot.index,
-        open=df_plot['Open'],
-        high=df_plot['High'],
-        low=df_plot['Low'],
-        close=df_plot['Close'],
-        name='Kerzen'
-    ))
-    fig.add_hline(y=lb, line=dict(color='black', width=2), annotation_text='lb')
-    fig.add_hline(y=ub, line=dict(color='black', width=2), annotation_text='ub')
-    for p in highlights:
-        fig.add_hline(y=p, line=dict(width=1, dash='dot'), annotation_text=f"{p:.2f}")
-    fig.update_layout(height=600, xaxis_rangeslider_visible=False)
-    return fig
-
-def load_data_year(ticker, year):
-    start_date = f"{year}-01-01"
-    end_date   = f"{year}-12-31"
-    df = yf.download(
-        ticker, 
-        start=start_date, 
-        end=end_date, 
-        interval='1d', 
-        progress=False, 
-        auto_adjust=False
-    )
-    # ▼▼▼ MultiIndex ggf. entfernen ▼▼▼
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.droplevel(1)
-
-    if df.empty:
-        raise ValueError(f"Keine Daten für das Vorjahr {year}. [{ticker}]")
-    df.reset_index(inplace=True)
-    df['Date'] = pd.to_datetime(df['Date'])
-    df.set_index('Date', inplace=True)
-    return df
-
 def run_vorjahr_model(ticker, analysis_date, mode_choice, divider_val,
                       vol_sel, atr_period, databuf):
     prev_year = analysis_date.year - 1
-    df_vj = load_data_year(ticker, prev_year)
-    vj_low = df_vj['Low'].min()
-    vj_high = df_vj['High'].max()
-    if vj_low is None or vj_high is None:
-        raise ValueError("Keine validen High/Low im Vorjahr.")
-
-    step_val = (vj_high - vj_low) / float(divider_val)
-    step_val = round(step_val, 4)
-
-    max_steps = 80
-    sequence = [round(vj_low + i * step_val, 4) for i in range(max_steps + 1)]
+    anchor = previous_anchor(ticker, analysis_date, "year")
+    if anchor is None:
+        raise ValueError(f"Keine Daten für das Vorjahr {prev_year}. [{ticker}]")
+    vj_low = anchor.low
+    vj_high = anchor.high
 
     total_days = databuf + atr_period + 3
     end_date = analysis_date
     start_date = end_date - timedelta(days=total_days)
-    df_current = yf.download(
-        ticker, 
-        start=start_date, 
-        end=end_date, 
-        interval='1d', 
-        progress=False, 
-        auto_adjust=False
-    )
-    # ▼▼▼ MultiIndex ggf. entfernen ▼▼▼
-    if isinstance(df_current.columns, pd.MultiIndex):
-        df_current.columns = df_current.columns.droplevel(1)
-
+    df_current = get_store().get_range(ticker, start_date, end_date)
     if df_current.empty:
         raise ValueError("Keine aktuellen Daten (Vorjahr-Modell).")
 
-    df_current.reset_index(inplace=True)
-    df_current['Date'] = pd.to_datetime(df_current['Date'])
-    df_current.set_index('Date', inplace=True)
-
     cutoff_date = analysis_date - timedelta(days=1)
     df_cut = df_current.loc[:cutoff_date]
     if df_cut.empty:
@@ -133,75 +75,38 @@ def run_vorjahr_model(ticker, analysis_date, mode_choice, divider_val,
     else:
         lb, ub = basis - curr_atr * vol_factor, basis
 
-    in_range = [x for x in sequence if lb <= x <= ub]
-    in_range.sort(reverse=True)
-
-    expansions = []
-    if mode_choice == "hoch":
-        ex_up = [x for x in sequence if x > ub]
-        ex_up.sort()
-        expansions = ex_up[:4]
-        expansions.sort(reverse=True)
-    else:
-        ex_down = [x for x in sequence if x < lb]
-        ex_down.sort(reverse=True)
-        expansions = ex_down[:4]
+    span = vj_high - vj_low
+    if span <= 0:
+        raise ValueError("Ungültige Spanne im Vorjahr (<=0).")
 
-    df_chart = df_cut.tail(10)
-    fig = plot_chart(df_chart, [], lb, ub)
+    step_val, in_range, expansions = build_anchor_levels(
+        vj_low, vj_high, divider_val, lb, ub, mode_choice
+    )
 
-    results = {
-        "vj_low": vj_low,
-        "vj_high": vj_high,
-        "divider_val": divider_val,
-        "step_val": step_val,
-        "basis": basis,
-        "preise_inrange_vorjahr": in_range,
-        "preise_ausserhalb_vorjahr": expansions,
-        "df_vj": df_vj,
-        "df_cut": df_cut,
-        "figure": fig,
-        "extreme_date": extreme_date,
-        "atr": curr_atr,
-        "lb": lb,
-        "ub": ub
-    }
+    results = ModelResult(
+        "vorjahr", ticker, analysis_date,
+        anchor_low=vj_low,
+        anchor_high=vj_high,
+        anchor_label=str(prev_year),
+        divider_val=divider_val,
+        step_val=step_val,
+        basis=basis,
+        in_range=in_range,
+        expansions=expansions,
+        extreme_date=extreme_date,
+        atr=curr_atr,
+        lb=lb,
+        ub=ub
+    )
+    results.set_chart_span(df_cut.tail(10))
     return results
 
 def load_data_range(ticker, start_date, end_date):
-    df = yf.download(
-        ticker, 
-        start=start_date, 
-        end=end_date, 
-        interval='1d', 
-        progress=False, 
-        auto_adjust=False
-    )
-    # ▼▼▼ MultiIndex ggf. entfernen ▼▼▼
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.droplevel(1)
-
+    df = get_store().get_range(ticker, start_date, end_date)
     if df.empty:
         raise ValueError("Falsches Wertpapierkürzel oder keine Daten (Vormonat).")
-    df.reset_index(inplace=True)
-    df['Date'] = pd.to_datetime(df['Date'])
-    df.set_index('Date', inplace=True)
     return df
 
-def get_previous_month_span(df, analysis_date):
-    m = analysis_date.month
-    y = analysis_date.year
-    if m == 1:
-        vm_year = y - 1
-        vm_month = 12
-    else:
-        vm_year = y
-        vm_month = m - 1
-    df_vm = df[(df.index.year == vm_year) & (df.index.month == vm_month)]
-    if df_vm.empty:
-        return None, None, vm_year, vm_month
-    return df_vm['Low'].min(), df_vm['High'].max(), vm_year, vm_month
-
 def run_vormonat_model(ticker, analysis_date, mode_choice, divider_val,
                        vol_choice, atr_period, databuf):
     total_days = databuf + atr_period + 3
@@ -211,9 +116,12 @@ def run_vormonat_model(ticker, analysis_date, mode_choice, divider_val,
     if df_all.empty:
         raise ValueError("Keine Daten (Vormonat).")
 
-    m_low, m_high, vm_year, vm_month = get_previous_month_span(df_all, analysis_date)
-    if m_low is None or m_high is None:
-        raise ValueError(f"Keine Daten für Vormonat {vm_month}.{vm_year}")
+    anchor = previous_anchor(ticker, analysis_date, "month")
+    if anchor is None:
+        vm_start = (pd.Timestamp(analysis_date).to_period("M") - 1).start_time
+        raise ValueError(f"Keine Daten für Vormonat {vm_start.month}.{vm_start.year}")
+    m_low, m_high = anchor.low, anchor.high
+    vm_year, vm_month = anchor.start.year, anchor.start.month
 
     cutoff = analysis_date - timedelta(days=1)
     df_cut = df_all.loc[:cutoff]
@@ -246,45 +154,24 @@ def run_vormonat_model(ticker, analysis_date, mode_choice, divider_val,
     if span <= 0:
         raise ValueError("Ungültige Spanne im Vormonat (<=0).")
 
-    step_val = span / float(divider_val)
-    step_val = round(step_val, 4)
-    max_steps = 80
-    sequence = [round(m_low + i * step_val, 4) for i in range(max_steps+1)]
-
-    in_range = [x for x in sequence if lb <= x <= ub]
-    in_range.sort(reverse=True)
-
-    expansions = []
-    if mode_choice == "hoch":
-        ex_up = [x for x in sequence if x > ub]
-        ex_up.sort()
-        expansions = ex_up[:4]
-        expansions.sort(reverse=True)
-    else:
-        ex_down = [x for x in sequence if x < lb]
-        ex_down.sort(reverse=True)
-        expansions = ex_down[:4]
-
-    df_chart = df_cut.tail(10)
-    highlights = in_range + expansions
-    fig = plot_chart(df_chart, highlights, lb, ub)
+    step_val, in_range, expansions = build_anchor_levels(
+        m_low, m_high, divider_val, lb, ub, mode_choice
+    )
 
-    results = {
-        "vm_year": vm_year,
-        "vm_month": vm_month,
-        "m_low": m_low,
-        "m_high": m_high,
-        "divider_val": divider_val,
-        "lb": lb,
-        "ub": ub,
-        "basis": basis,
-        "preise_inrange_vormonat": in_range,
-        "preise_ausserhalb_vormonat": expansions,
-        "df": df_all,
-        "df_cut": df_cut,
-        "figure": fig,
-        "extreme_date": extreme_date,
-        "atr": curr_atr,
-        "step_val": step_val
-    }
+    results = ModelResult(
+        "vormonat", ticker, analysis_date,
+        anchor_low=m_low,
+        anchor_high=m_high,
+        anchor_label=f"{vm_month}.{vm_year}",
+        divider_val=divider_val,
+        lb=lb,
+        ub=ub,
+        basis=basis,
+        in_range=in_range,
+        expansions=expansions,
+        extreme_date=extreme_date,
+        atr=curr_atr,
+        step_val=step_val
+    )
+    results.set_chart_span(df_cut.tail(10))
     return results
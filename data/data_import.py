@@ -0,0 +1,279 @@
+# data_import.py
+"""
+Massen-Import großer Kurs-Dumps (CSV, auch .gz/.zip/.bz2/.xz) in die
+lokale Historie, ohne einzelne yf.download-Aufrufe je Ticker.
+
+Ablauf mit begrenztem Speicher:
+  1. Streamen: die Dateien werden in Blöcken ('chunksize' Zeilen)
+     gelesen, Spalten auf das Standard-Schema abgebildet und die Zeilen
+     je Ticker an eine Zwischendatei angehängt.
+  2. Abschließen: je Ticker wird NUR dessen Zwischendatei geladen, mit
+     einer vorhandenen Historie zusammengeführt, über data_ingest.ingest_bars
+     normalisiert/geprüft und als '<TICKER>.csv' geschrieben – im Format,
+     das LocalCsvProvider liest.
+
+Speicherbedarf: ein Block + die Historie des größten Tickers.
+
+Die App nutzt die Historie, wenn HISTORY_DIR gesetzt ist (data_store:
+lokale Kerzen zuerst, nur neuere Kerzen aus dem Netz).
+
+Aufruf:
+    python -m data.data_import dump.csv.gz --out historie/
+    python -m data.data_import eod_*.csv --out historie/ --map sym=Ticker,dt=Date --workers 4
+    python -m data.data_import AAPL.csv --out historie/ --ticker AAPL
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data.data_ingest import BAR_COLUMNS, DEFAULT_MAX_GAP_DAYS, ingest_bars, is_crypto
+
+DEFAULT_CHUNKSIZE = 200_000
+
+# Zwischendateien haben IMMER dieses Schema (Kopfzeile nur beim ersten
+# Anhängen) – Dumps mit unterschiedlichen Spalten landen so nicht unter
+# falschen Überschriften; fehlende Werte bleiben leer.
+SPILL_COLUMNS = ["Date"] + BAR_COLUMNS
+
+# Übliche Spaltennamen in Vendor-Dumps (klein geschrieben) -> Standard-Schema
+COLUMN_ALIASES = {
+    "Ticker": ("ticker", "symbol", "sym", "code", "instrument", "isin"),
+    "Date": ("date", "datetime", "timestamp", "time", "day", "trade_date", "tradedate"),
+    "Open": ("open", "o", "open_price", "opening"),
+    "High": ("high", "h", "high_price"),
+    "Low": ("low", "l", "low_price"),
+    "Close": ("close", "c", "close_price", "last", "closing"),
+    "Adj Close": ("adj close", "adj_close", "adjclose", "adjusted_close", "adj"),
+    "Volume": ("volume", "vol", "v"),
+}
+
+_COMPRESSION_SUFFIXES = (".gz", ".bz2", ".zip", ".xz", ".zst")
+
+
+def parse_mapping(text):
+    """
+    'sym=Ticker,dt=Date' -> {'sym': 'Ticker', 'dt': 'Date'}
+    """
+    mapping = {}
+    for part in (text or "").split(","):
+        if part.strip():
+            source, target = part.split("=", 1)
+            mapping[source.strip()] = target.strip()
+    return mapping
+
+
+def resolve_columns(header, mapping=None):
+    """
+    Ordnet die Spalten einer Datei dem Standard-Schema zu.
+    'mapping' (Quelle -> Ziel) hat Vorrang, der Rest wird über
+    COLUMN_ALIASES erkannt (Groß-/Kleinschreibung egal).
+    Gibt {Quellspalte: Zielspalte} zurück.
+    """
+    mapping = dict(mapping or {})
+    unknown = [t for t in mapping.values() if t not in COLUMN_ALIASES]
+    if unknown:
+        raise ValueError(f"Unbekannte Zielspalten: {unknown}")
+
+    resolved = {s: t for s, t in mapping.items() if s in header}
+    taken = set(resolved.values())
+    for col in header:
+        if col in resolved:
+            continue
+        key = str(col).strip().lower()
+        for target, aliases in COLUMN_ALIASES.items():
+            if target not in taken and (key == target.lower() or key in aliases):
+                resolved[col] = target
+                taken.add(target)
+                break
+
+    missing = [c for c in ("Date", "Open", "High", "Low", "Close") if c not in taken]
+    if missing:
+        raise ValueError(f"Spalten nicht gefunden: {missing} (vorhanden: {list(header)})")
+    return resolved
+
+
+def ticker_from_path(path):
+    """
+    'daten/AAPL.csv.gz' -> 'AAPL'
+    """
+    name = os.path.basename(path)
+    for suffix in _COMPRESSION_SUFFIXES:
+        if name.lower().endswith(suffix):
+            name = name[:-len(suffix)]
+    return os.path.splitext(name)[0]
+
+
+def _spill_path(spill_dir, ticker):
+    return os.path.join(spill_dir, f"{ticker}.csv")
+
+
+def _valid_ticker(ticker):
+    return bool(ticker) and os.sep not in ticker and ticker not in (".", "..")
+
+
+def _spill_chunk(chunk, spill_dir, seen, stats, date_format=None):
+    """
+    Block normalisieren (Datum parsen) und zeilenweise je Ticker an die
+    Zwischendateien anhängen.
+    """
+    dates = pd.to_datetime(chunk["Date"], format=date_format, errors="coerce")
+    if getattr(dates.dt, "tz", None) is not None:
+        dates = dates.dt.tz_localize(None)
+    chunk = chunk.assign(Date=dates.dt.strftime("%Y-%m-%d"))
+    value_cols = [c for c in BAR_COLUMNS if c in chunk.columns]
+    for col in value_cols:
+        if not pd.api.types.is_numeric_dtype(chunk[col]):
+            chunk[col] = pd.to_numeric(chunk[col], errors="coerce")
+
+    bad = dates.isna() | chunk["Ticker"].isna()
+    stats["rows_skipped"] += int(bad.sum())
+    chunk = chunk[~bad]
+
+    for ticker, group in chunk.groupby("Ticker", sort=False):
+        ticker = str(ticker).strip()
+        if not _valid_ticker(ticker):
+            stats["rows_skipped"] += len(group)
+            continue
+        path = _spill_path(spill_dir, ticker)
+        group.reindex(columns=SPILL_COLUMNS).to_csv(path, mode="a", header=ticker not in seen, index=False)
+        seen.add(ticker)
+    stats["rows_read"] += len(chunk)
+
+
+def stream_to_spill(paths, spill_dir, mapping=None, ticker=None, chunksize=DEFAULT_CHUNKSIZE,
+                    sep=",", date_format=None):
+    """
+    Phase 1: alle Dateien blockweise lesen und je Ticker aufteilen.
+    Ohne Ticker-Spalte gilt 'ticker' bzw. der Dateiname als Ticker.
+    Gibt (Menge der Ticker, Statistik-dict) zurück.
+    """
+    seen = set()
+    stats = {"files": 0, "chunks": 0, "rows_read": 0, "rows_skipped": 0}
+    for path in paths:
+        header = pd.read_csv(path, sep=sep, nrows=0, compression="infer").columns
+        columns = resolve_columns(header, mapping)
+        file_ticker = ticker or ticker_from_path(path)
+        print(f"[DEBUG data_import] {path}: Spalten {columns}")
+
+        reader = pd.read_csv(path, sep=sep, usecols=list(columns), chunksize=chunksize,
+                             compression="infer", dtype={s: "string" for s, t in columns.items()
+                                                         if t in ("Ticker", "Date")})
+        for chunk in reader:
+            chunk = chunk.rename(columns=columns)
+            if "Ticker" not in chunk.columns:
+                chunk["Ticker"] = file_ticker
+            _spill_chunk(chunk, spill_dir, seen, stats, date_format)
+            stats["chunks"] += 1
+        stats["files"] += 1
+    return seen, stats
+
+
+def finalize_ticker(ticker, spill_dir, out_dir, merge=True, dtype=np.float64, max_gap_days=None):
+    """
+    Phase 2 für EINEN Ticker: Zwischendatei + vorhandene Historie
+    zusammenführen (neue Zeilen gewinnen), per ingest_bars aufbereiten und
+    '<out_dir>/<ticker>.csv' atomar ersetzen. Gibt eine Zusammenfassung zurück.
+    """
+    new = pd.read_csv(_spill_path(spill_dir, ticker), parse_dates=["Date"])
+    # Spalten, die in keinem Dump vorkamen, gar nicht erst übernehmen
+    new = new.dropna(axis=1, how="all")
+    target = os.path.join(out_dir, f"{ticker}.csv")
+    if merge and os.path.exists(target):
+        old = pd.read_csv(target, parse_dates=["Date"])
+        raw = pd.concat([old, new], ignore_index=True)
+    else:
+        raw = new
+    # Stabil nach Datum sortieren, damit bei Duplikaten die neue Zeile zuletzt steht
+    raw = raw.sort_values("Date", kind="stable")
+
+    if max_gap_days is None:
+        max_gap_days = 1 if is_crypto(ticker) else DEFAULT_MAX_GAP_DAYS
+    df, report = ingest_bars(raw, ticker, dtype=dtype, max_gap_days=max_gap_days)
+
+    tmp = f"{target}.tmp"
+    df.to_csv(tmp, index_label="Date")
+    os.replace(tmp, target)
+    return {
+        "Ticker": ticker,
+        "Zeilen roh": report.rows_in,
+        "Zeilen": report.rows_out,
+        "Von": df.index[0].date() if len(df) else None,
+        "Bis": df.index[-1].date() if len(df) else None,
+        "Auffälligkeiten": len(report.anomalies),
+    }
+
+
+def _finalize_args(args):
+    return finalize_ticker(*args)
+
+
+def import_csv(paths, out_dir, mapping=None, ticker=None, chunksize=DEFAULT_CHUNKSIZE,
+               sep=",", date_format=None, merge=True, dtype=np.float64, max_workers=1):
+    """
+    Komplett-Import: Dateien streamen, je Ticker aufbereiten und in
+    'out_dir' schreiben. Phase 2 läuft bei max_workers > 1 in einem
+    Prozess-Pool (jeder Worker hält nur einen Ticker im Speicher).
+    Gibt (Zusammenfassung als DataFrame, Statistik-dict) zurück.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    spill_dir = tempfile.mkdtemp(prefix=".import-", dir=out_dir)
+    try:
+        tickers, stats = stream_to_spill(paths, spill_dir, mapping, ticker, chunksize, sep, date_format)
+        jobs = [(t, spill_dir, out_dir, merge, dtype) for t in sorted(tickers)]
+        if max_workers == 1 or len(jobs) <= 1:
+            rows = [_finalize_args(j) for j in jobs]
+        else:
+            chunks = max(1, len(jobs) // ((max_workers or os.cpu_count() or 1) * 4))
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                rows = list(executor.map(_finalize_args, jobs, chunksize=chunks))
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    stats["tickers"] = len(rows)
+    summary = pd.DataFrame(rows, columns=["Ticker", "Zeilen roh", "Zeilen", "Von", "Bis", "Auffälligkeiten"])
+    print(f"[DEBUG data_import] fertig: {stats}")
+    return summary, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Massen-Import von Kurs-Dumps in die lokale Historie")
+    parser.add_argument("paths", nargs="+", help="CSV-Dateien (auch komprimiert)")
+    parser.add_argument("--out", required=True, help="Zielverzeichnis (<TICKER>.csv, vgl. HISTORY_DIR)")
+    parser.add_argument("--map", help="Spalten-Zuordnung Quelle=Ziel, z.B. sym=Ticker,dt=Date")
+    parser.add_argument("--ticker", help="Ticker für Dateien ohne Ticker-Spalte (Standard: Dateiname)")
+    parser.add_argument("--sep", default=",", help="Trennzeichen")
+    parser.add_argument("--date-format", help="Datumsformat, z.B. %%Y%%m%%d (Standard: automatisch)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Zeilen je Block")
+    parser.add_argument("--workers", type=int, default=1, help="Prozesse für das Aufbereiten je Ticker")
+    parser.add_argument("--float32", action="store_true", help="Kurse als float32 speichern")
+    parser.add_argument("--replace", action="store_true", help="Vorhandene Historien ersetzen statt ergänzen")
+    parser.add_argument("--summary", help="Zusammenfassung zusätzlich als CSV schreiben")
+    args = parser.parse_args(argv)
+
+    summary, stats = import_csv(
+        args.paths,
+        args.out,
+        mapping=parse_mapping(args.map),
+        ticker=args.ticker,
+        chunksize=args.chunksize,
+        sep=args.sep,
+        date_format=args.date_format,
+        merge=not args.replace,
+        dtype=np.float32 if args.float32 else np.float64,
+        max_workers=args.workers,
+    )
+    print(summary.to_string(index=False, max_rows=50))
+    print(f"{stats['tickers']} Ticker, {stats['rows_read']} Zeilen gelesen, "
+          f"{stats['rows_skipped']} übersprungen")
+    if args.summary:
+        summary.to_csv(args.summary, index=False)
+
+
+if __name__ == '__main__':
+    main()
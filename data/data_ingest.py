@@ -0,0 +1,190 @@
+# data_ingest.py
+"""
+Einmalige Aufbereitung & Prüfung von Kursdaten beim Eintritt in den
+Historien-Speicher (data_store).
+
+Alles, was früher bei jedem Laden wiederholt wurde (MultiIndex entfernen,
+reset_index, pd.to_datetime, set_index), passiert hier genau einmal.
+Danach gilt für jede gespeicherte Historie:
+  - DatetimeIndex 'Date', aufsteigend sortiert, ohne doppelte Daten
+  - nur bekannte Spalten, einheitlicher Float-Typ (float64 oder float32)
+  - keine Zeilen mit fehlenden OHLC-Werten (die sonst zu NaN-ATR führen)
+Auffälligkeiten werden vektorisiert ermittelt und im IngestReport vermerkt.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+OHLC_COLUMNS = ["Open", "High", "Low", "Close"]
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+# Größte Lücke (Kalendertage) zwischen zwei Kerzen, die noch als normal gilt
+# (Wochenende + Oster-/Brückentage). Für Krypto (24/7) passt 1.
+DEFAULT_MAX_GAP_DAYS = 5
+
+CRYPTO_PATTERN = re.compile(r"-(USD|USDT|EUR|BTC|ETH)$")
+
+
+def is_crypto(ticker):
+    """
+    Krypto-Ticker im yfinance-Format, z.B. 'BTC-USD', 'ETH-EUR'.
+    """
+    return bool(CRYPTO_PATTERN.search(ticker.upper()))
+
+
+class IngestReport:
+    """
+    Ergebnis der Prüfung eines Datenblocks.
+    anomalies: DataFrame mit Spalten Date, Typ, Detail
+    """
+
+    def __init__(self, ticker, rows_in, rows_out, anomalies):
+        self.ticker = ticker
+        self.rows_in = rows_in
+        self.rows_out = rows_out
+        self.anomalies = anomalies
+
+    def counts(self):
+        """
+        Anzahl Auffälligkeiten je Typ, z.B. {'nan_row': 2, 'gap': 1}.
+        """
+        if self.anomalies.empty:
+            return {}
+        return self.anomalies['Typ'].value_counts().to_dict()
+
+    def merge(self, other):
+        """
+        Fasst zwei Berichte zusammen (z.B. Erst-Import + Nachladen).
+        """
+        return IngestReport(
+            self.ticker,
+            self.rows_in + other.rows_in,
+            other.rows_out,
+            pd.concat([self.anomalies, other.anomalies], ignore_index=True),
+        )
+
+    def __repr__(self):
+        return (f"IngestReport({self.ticker}: {self.rows_in} -> {self.rows_out} Zeilen, "
+                f"{self.counts()})")
+
+
+def _anomaly_frame(dates, typ, detail):
+    return pd.DataFrame({"Date": dates, "Typ": typ, "Detail": detail})
+
+
+def normalize_bars(df):
+    """
+    Bringt Rohdaten (yfinance, CSV, ...) auf das Standard-Schema:
+    MultiIndex-Spalten entfernen, Datum als sortierter DatetimeIndex 'Date'
+    (ohne Zeitzone), nur bekannte Spalten.
+    Doppelte Daten und NaN-Zeilen bleiben hier noch erhalten (siehe ingest_bars).
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=BAR_COLUMNS[:4], index=pd.DatetimeIndex([], name="Date"))
+
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.droplevel(1)
+
+    if "Date" in df.columns:
+        df = df.set_index("Date")
+    index = pd.to_datetime(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    index.name = "Date"
+
+    cols = [c for c in BAR_COLUMNS if c in df.columns]
+    df = df[cols].set_axis(index, axis=0)
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind="stable")
+    return df
+
+
+def validate_bars(df, max_gap_days=DEFAULT_MAX_GAP_DAYS):
+    """
+    Vektorisierte Prüfung eines normalisierten DataFrames.
+    Gibt ein DataFrame (Date, Typ, Detail) mit allen Auffälligkeiten zurück:
+      duplicate  – Datum mehrfach vorhanden
+      nan_row    – fehlende OHLC-Werte
+      zero_range – High == Low (z.B. Feiertags-Platzhalter)
+      inverted   – High < Low oder Open/Close außerhalb [Low, High]
+      non_positive – Preis <= 0
+      gap        – Lücke von mehr als max_gap_days Kalendertagen
+    """
+    parts = []
+    if df.empty:
+        return _anomaly_frame([], [], [])
+
+    dates = df.index
+    dup = dates.duplicated(keep="last")
+    if dup.any():
+        parts.append(_anomaly_frame(dates[dup], "duplicate", "Datum doppelt, letzte Zeile behalten"))
+
+    ohlc = df[[c for c in OHLC_COLUMNS if c in df.columns]].to_numpy(dtype=np.float64)
+    nan_rows = np.isnan(ohlc).any(axis=1)
+    if nan_rows.any():
+        parts.append(_anomaly_frame(dates[nan_rows], "nan_row", "fehlende OHLC-Werte, Zeile verworfen"))
+
+    if ohlc.shape[1] == 4:
+        o, h, l, c = ohlc.T
+        with np.errstate(invalid="ignore"):
+            zero_range = ~nan_rows & (h == l)
+            inverted = ~nan_rows & ((h < l) | (o > h) | (o < l) | (c > h) | (c < l))
+            non_positive = ~nan_rows & (ohlc <= 0).any(axis=1)
+        if zero_range.any():
+            parts.append(_anomaly_frame(dates[zero_range], "zero_range", "High == Low"))
+        if inverted.any():
+            parts.append(_anomaly_frame(dates[inverted], "inverted", "High/Low/Open/Close inkonsistent"))
+        if non_positive.any():
+            parts.append(_anomaly_frame(dates[non_positive], "non_positive", "Preis <= 0"))
+
+    if max_gap_days is not None and len(dates) > 1:
+        gaps = np.diff(dates.values).astype("timedelta64[D]").astype(np.int64)
+        big = np.flatnonzero(gaps > max_gap_days)
+        if len(big):
+            parts.append(_anomaly_frame(dates[big + 1], "gap",
+                                        [f"{g} Tage seit letzter Kerze" for g in gaps[big]]))
+
+    if not parts:
+        return _anomaly_frame([], [], [])
+    return pd.concat(parts, ignore_index=True).sort_values("Date", kind="stable", ignore_index=True)
+
+
+def boundary_gap(last_date, df, max_gap_days=DEFAULT_MAX_GAP_DAYS):
+    """
+    Lücke zwischen der letzten gespeicherten Kerze ('last_date') und der
+    ersten Kerze eines nachgeladenen Blocks 'df' – validate_bars sieht
+    nur den Block selbst. Anomalie-DataFrame wie validate_bars (leer oder
+    eine Zeile 'gap').
+    """
+    if max_gap_days is None or df.empty:
+        return _anomaly_frame([], [], [])
+    first_date = df.index[0]
+    gap = (first_date - pd.Timestamp(last_date)).days
+    if gap <= max_gap_days:
+        return _anomaly_frame([], [], [])
+    return _anomaly_frame([first_date], "gap", [f"{gap} Tage seit letzter gespeicherter Kerze"])
+
+
+def ingest_bars(raw, ticker, dtype=np.float64, max_gap_days=DEFAULT_MAX_GAP_DAYS):
+    """
+    Komplette Aufnahme eines Datenblocks: normalisieren, prüfen,
+    doppelte Daten & NaN-Zeilen entfernen, Float-Typ vereinheitlichen.
+    Gibt (df, IngestReport) zurück.
+    """
+    rows_in = 0 if raw is None else len(raw)
+    df = normalize_bars(raw)
+    anomalies = validate_bars(df, max_gap_days)
+
+    if not df.empty:
+        df = df[~df.index.duplicated(keep="last")]
+        ohlc_cols = [c for c in OHLC_COLUMNS if c in df.columns]
+        df = df[df[ohlc_cols].notna().all(axis=1)]
+    df = df.astype(dtype)
+
+    report = IngestReport(ticker, rows_in, len(df), anomalies)
+    if not anomalies.empty:
+        print(f"[DEBUG data_ingest] {report}")
+    return df, report
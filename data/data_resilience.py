@@ -0,0 +1,269 @@
+# data_resilience.py
+"""
+Absicherung des Datenproviders:
+  - Wiederholungen mit begrenztem exponentiellem Backoff
+  - Zeitlimit pro Versuch, gemessen ab dem Provider-Aufruf (Wartezeit
+    in der Warteschlange bzw. auf die Provider-Sperre zählt nicht)
+  - Circuit Breaker: nach mehreren Fehlschlägen in Folge wird der
+    Provider für eine Weile gar nicht mehr gefragt (schnelles Scheitern
+    statt langer Wartezeiten)
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class ProviderError(ValueError):
+    """
+    Provider nicht erreichbar / gedrosselt / Zeitüberschreitung.
+    ValueError-Unterklasse, damit app.main die Meldung wie bisher anzeigt.
+    """
+
+
+class CircuitOpenError(ProviderError):
+    """
+    Circuit Breaker ist offen – der Provider wird vorerst nicht gefragt.
+    """
+
+
+class CircuitBreaker:
+    """
+    closed    => Aufrufe erlaubt
+    open      => nach 'failure_threshold' Fehlern in Folge; Aufrufe werden
+                 'reset_timeout' Sekunden lang sofort abgelehnt
+    half-open => danach ist genau ein Probe-Aufruf erlaubt; Erfolg schließt,
+                 Fehler öffnet erneut
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._probe_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probe_running:
+                self._probe_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_running = False
+
+    def release_probe(self):
+        """
+        Probe-Aufruf (half-open) fand nicht statt – weder Erfolg noch Fehler.
+        """
+        with self._lock:
+            self._probe_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+
+
+class _Attempt:
+    """
+    Ein Versuch im Worker-Thread. Die Uhr für das Zeitlimit läuft erst,
+    wenn der Worker den Provider wirklich aufruft (nach Warteschlange und
+    ggf. Provider-Sperre). Gibt der Aufrufer vorher auf, wird der Provider
+    gar nicht mehr gefragt.
+    """
+
+    def __init__(self):
+        self.started = threading.Event()
+        self._abandoned = False
+        self._lock = threading.Lock()
+
+    def begin(self):
+        """
+        Worker: True, falls der Aufruf stattfinden soll.
+        """
+        with self._lock:
+            if self._abandoned:
+                return False
+            self.started.set()
+            return True
+
+    def abandon(self):
+        """
+        Aufrufer: False, falls der Provider-Aufruf schon läuft.
+        """
+        with self._lock:
+            if self.started.is_set():
+                return False
+            self._abandoned = True
+            return True
+
+
+class ResilientFetcher:
+    """
+    Hülle um einen Fetcher (callable(ticker, start=None, end=None)) mit
+    Retry, Zeitlimit und Circuit Breaker. Kann direkt als 'fetcher' an den
+    HistoryStore übergeben werden.
+
+    attempts:      Anzahl Versuche insgesamt
+    timeout:       Sekunden pro Versuch – gemessen ab dem eigentlichen
+                   Provider-Aufruf, nicht ab dem Einreihen
+    backoff:       Basis-Wartezeit in Sekunden (verdoppelt sich je Versuch)
+    max_delay:     Obergrenze der Wartezeit zwischen zwei Versuchen
+    lock:          optionale Sperre, unter der der Provider aufgerufen wird
+                   (z.B. yfinance: nie parallel); Warten darauf zählt nicht
+                   zum Zeitlimit
+    queue_timeout: maximale Wartezeit auf Worker/Sperre; wird sie
+                   überschritten, ist der Provider nur ausgelastet, nicht
+                   gestört => ProviderError OHNE Fehler im Circuit Breaker
+
+    Hängende Aufrufe: ein Thread lässt sich nicht abbrechen – ein Versuch,
+    der sein Zeitlimit überschritten hat, läuft weiter (und hält ggf. die
+    Sperre). Solange er die Sperre hält bzw. solche Aufrufe alle Worker
+    belegen, scheitern neue Versuche SOFORT und zählen als Fehler im
+    Circuit Breaker, statt sich hinter dem hängenden Aufruf anzustellen.
+    Anzahl siehe 'hung_calls'.
+    """
+
+    # Abfrage-Intervall beim Warten auf den Start eines Versuchs
+    _POLL_SECONDS = 0.05
+
+    def __init__(self, fetcher, attempts=3, timeout=20.0, backoff=0.5, max_delay=4.0,
+                 breaker=None, sleep=time.sleep, max_workers=4, lock=None,
+                 queue_timeout=120.0):
+        self._fetcher = fetcher
+        self.attempts = attempts
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+        self._lock = lock
+        self.queue_timeout = queue_timeout
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="provider")
+        self._hung = set()
+        self._hung_lock = threading.Lock()
+
+    @property
+    def hung_calls(self):
+        """
+        Anzahl Provider-Aufrufe, die ihr Zeitlimit überschritten haben und
+        noch laufen (belegen je einen Worker, ggf. die Sperre).
+        """
+        with self._hung_lock:
+            return len(self._hung)
+
+    def _mark_hung(self, future):
+        with self._hung_lock:
+            self._hung.add(future)
+        future.add_done_callback(self._unmark_hung)
+
+    def _unmark_hung(self, future):
+        with self._hung_lock:
+            self._hung.discard(future)
+
+    def _blocked(self):
+        """
+        True, solange hängende Aufrufe die Sperre bzw. alle Worker belegen.
+        """
+        n = self.hung_calls
+        return n >= self.max_workers or (self._lock is not None and n > 0)
+
+    def _fail_blocked(self, ticker):
+        self.breaker.record_failure()
+        raise ProviderError(
+            f"Datenprovider hängt ({self.hung_calls} Aufruf(e) über dem Zeitlimit), "
+            f"bitte später erneut versuchen. [{ticker}]"
+        )
+
+    def _run(self, attempt, ticker, start, end):
+        if self._lock is None:
+            if not attempt.begin():
+                return None
+            return self._fetcher(ticker, start=start, end=end)
+        with self._lock:
+            if not attempt.begin():
+                return None
+            return self._fetcher(ticker, start=start, end=end)
+
+    def _wait_started(self, attempt, future, ticker):
+        """
+        Wartet, bis der Versuch den Provider aufruft. Gibt der Aufrufer
+        vorher auf (hängender Aufruf oder queue_timeout), wird der Versuch
+        verworfen und der Provider nicht mehr gefragt.
+        """
+        deadline = time.monotonic() + self.queue_timeout
+        while not attempt.started.wait(self._POLL_SECONDS):
+            blocked = self._blocked()
+            if not blocked and time.monotonic() < deadline:
+                continue
+            if not attempt.abandon():
+                return  # gerade doch gestartet
+            future.cancel()
+            if blocked:
+                self._fail_blocked(ticker)
+            # Nur ausgelastet: kein Fehler des Providers, kein Retry
+            self.breaker.release_probe()
+            raise ProviderError(
+                f"Datenprovider ausgelastet, keine Antwort nach {self.queue_timeout:g}s Wartezeit. [{ticker}]"
+            )
+
+    def __call__(self, ticker, start=None, end=None):
+        last_error = None
+        for i in range(self.attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError(
+                    f"Datenprovider vorübergehend gesperrt (zu viele Fehler), bitte später erneut versuchen. [{ticker}]"
+                )
+            # Kein (erneuter) Versuch hinter einem hängenden Aufruf
+            if self._blocked():
+                self._fail_blocked(ticker)
+
+            attempt = _Attempt()
+            future = self._executor.submit(self._run, attempt, ticker, start, end)
+            self._wait_started(attempt, future, ticker)
+
+            try:
+                df = future.result(timeout=self.timeout)
+                self.breaker.record_success()
+                return df
+            except FutureTimeout:
+                if not future.cancel():
+                    self._mark_hung(future)
+                last_error = f"Zeitüberschreitung nach {self.timeout:g}s"
+            except Exception as e:
+                last_error = str(e) or type(e).__name__
+            self.breaker.record_failure()
+            print(f"[DEBUG data_resilience] Versuch {i + 1}/{self.attempts} für {ticker} fehlgeschlagen: {last_error}")
+
+            if i + 1 < self.attempts:
+                delay = min(self.max_delay, self.backoff * (2 ** i))
+                self._sleep(delay * (0.5 + random.random() / 2))
+
+        raise ProviderError(f"Datenprovider nicht erreichbar für {ticker}: {last_error}")
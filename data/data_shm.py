@@ -0,0 +1,206 @@
+# data_shm.py
+"""
+Übergabe von Kerzen an Worker-Prozesse über Shared Memory.
+
+Statt jedem Worker das DataFrame eines Tickers zu picklen, legt der
+Haupt-Prozess die Kerzen EINMAL in ein Shared-Memory-Segment:
+
+    [ Datum (int64, ns) x N | Werte (float, Spalten x N) ]
+
+An den Worker geht nur ein kleiner BarsHandle (Name, Zeilen, Spalten,
+dtype). Der Worker blendet das Segment ein und baut daraus ein
+DataFrame OHNE Kopie (schreibgeschützte Sicht auf das Segment).
+
+Lebenszyklus:
+  - SharedBarsPool (Haupt-Prozess) erzeugt die Segmente und gibt sie mit
+    release(ticker) bzw. spätestens beim Verlassen des with-Blocks frei
+    (close + unlink).
+  - call_with_bars(handle, fn) (Worker) blendet das Segment nur für die
+    Dauer von fn ein und schließt es danach wieder.
+"""
+
+import gc
+import sys
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+class BarsHandle:
+    """
+    Picklebare Beschreibung eines Segments (wenige Bytes statt Kerzen).
+    """
+
+    __slots__ = ("ticker", "name", "rows", "columns", "dtype")
+
+    def __init__(self, ticker, name, rows, columns, dtype):
+        self.ticker = ticker
+        self.name = name
+        self.rows = rows
+        self.columns = tuple(columns)
+        self.dtype = dtype
+
+    @property
+    def nbytes(self):
+        return self.rows * 8 + self.rows * len(self.columns) * np.dtype(self.dtype).itemsize
+
+    def __repr__(self):
+        return f"BarsHandle({self.ticker}, {self.name}, rows={self.rows}, columns={list(self.columns)})"
+
+
+def _views(buf, handle):
+    """
+    (Datum-Array, Werte-Array [Spalten x Zeilen]) als Sichten auf 'buf'.
+    """
+    dates = np.ndarray((handle.rows,), dtype=np.int64, buffer=buf)
+    values = np.ndarray((len(handle.columns), handle.rows), dtype=handle.dtype,
+                        buffer=buf, offset=handle.rows * 8)
+    return dates, values
+
+
+def publish_bars(ticker, df, dtype=None):
+    """
+    Kopiert die Kerzen von 'df' (Date-Index, nur numerische Spalten) in ein
+    neues Segment. Gibt (SharedMemory, BarsHandle) zurück; der Aufrufer ist
+    für close()/unlink() verantwortlich (siehe SharedBarsPool).
+    """
+    if dtype is None:
+        dtype = np.result_type(*df.dtypes) if len(df.columns) else np.float64
+    dtype = np.dtype(dtype)
+    handle = BarsHandle(ticker, None, len(df), df.columns, dtype.str)
+
+    # SharedMemory verlangt size > 0
+    shm = shared_memory.SharedMemory(create=True, size=max(handle.nbytes, 1))
+    handle.name = shm.name
+    dates, values = _views(shm.buf, handle)
+    dates[:] = df.index.as_unit("ns").asi8
+    values[:] = df.to_numpy(dtype=dtype).T
+    del dates, values
+    return shm, handle
+
+
+def _open_segment(name):
+    """
+    Vorhandenes Segment öffnen. Freigeben (unlink) darf nur der
+    Haupt-Prozess; ab Python 3.13 wird das Segment daher im Worker gar
+    nicht erst beim resource_tracker angemeldet. Bis 3.12 teilen sich die
+    Worker eines Pools den resource_tracker des Haupt-Prozesses, die
+    erneute Anmeldung ist dort wirkungslos.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _frame(shm, handle):
+    """
+    Schreibgeschütztes DataFrame als Sicht auf das Segment (keine Kopie).
+    """
+    dates, values = _views(shm.buf, handle)
+    values.flags.writeable = False
+    index = pd.DatetimeIndex(dates.view("datetime64[ns]"), name="Date", copy=False)
+    return pd.DataFrame(values.T, index=index, columns=list(handle.columns), copy=False)
+
+
+def call_with_bars(handle, fn, *args, **kwargs):
+    """
+    Worker-Seite: blendet das Segment ein, ruft fn(df, *args, **kwargs) mit
+    dem DataFrame ohne Kopie auf und schließt das Segment danach wieder.
+    Das DataFrame ist nur innerhalb von 'fn' gültig; das Ergebnis darf
+    keine Sichten darauf enthalten (Skalare, Listen, Kopien).
+    """
+    _close_deferred()
+    shm = _open_segment(handle.name)
+    try:
+        return fn(_frame(shm, handle), *args, **kwargs)
+    finally:
+        _close_segment(shm)
+
+
+# Segmente, die beim Schließen noch Sichten hatten (z.B. über einen
+# Traceback) – werden beim nächsten Aufruf erneut geschlossen.
+_deferred = []
+
+
+def _close_segment(shm):
+    try:
+        shm.close()
+    except BufferError:
+        gc.collect()
+        try:
+            shm.close()
+        except BufferError:
+            _deferred.append(shm)
+
+
+def _close_deferred():
+    pending = list(_deferred)
+    _deferred.clear()
+    for shm in pending:
+        _close_segment(shm)
+
+
+class SharedBarsPool:
+    """
+    Verwaltet die Segmente einer Berechnung im Haupt-Prozess.
+
+        with SharedBarsPool() as pool:
+            handle = pool.publish("BTC-USD", df)
+            ... Worker mit 'handle' rechnen lassen ...
+            pool.release("BTC-USD")       # sobald der Job fertig ist
+
+    Beim Verlassen des with-Blocks werden alle noch offenen Segmente
+    freigegeben – auch bei Exceptions.
+    """
+
+    def __init__(self):
+        self._segments = {}
+        self._lock = threading.Lock()
+
+    def publish(self, ticker, df, dtype=None):
+        """
+        Legt 'df' für 'ticker' ab (einmal je Ticker) und gibt den BarsHandle zurück.
+        """
+        with self._lock:
+            if ticker in self._segments:
+                return self._segments[ticker][1]
+        shm, handle = publish_bars(ticker, df, dtype)
+        with self._lock:
+            self._segments[ticker] = (shm, handle)
+        return handle
+
+    def release(self, ticker):
+        """
+        Gibt das Segment von 'ticker' frei (close + unlink).
+        """
+        with self._lock:
+            entry = self._segments.pop(ticker, None)
+        if entry is not None:
+            shm = entry[0]
+            _close_segment(shm)
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        for ticker in list(self._segments):
+            self.release(ticker)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(handle.nbytes for _, handle in self._segments.values())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._segments)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,403 @@
+# data_store.py
+"""
+Gemeinsamer Historien-Speicher (ein Prozess, alle Sessions).
+
+Hält pro Ticker die komplette Tages-Historie im Speicher und lädt
+bei Bedarf nur neue Kerzen nach, statt bei jeder Anfrage erneut
+'yf.download' mit großem Zeitfenster aufzurufen.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from data.data_resilience import ProviderError, ResilientFetcher
+from data.data_ingest import (
+    IngestReport, boundary_gap, ingest_bars, is_crypto, normalize_bars, DEFAULT_MAX_GAP_DAYS
+)
+
+
+# yf.download teilt globalen Zustand (u.a. yf.shared._ERRORS) – nicht parallel aufrufen.
+# Reentrant: der ResilientFetcher hält die Sperre schon vor fetch_daily, damit
+# das Warten darauf nicht in sein Zeitlimit fällt.
+_YF_LOCK = threading.RLock()
+
+# Fehlermeldungen von yfinance, die "Ticker gibt es nicht / keine Daten"
+# bedeuten (kein Provider-Problem, daher kein Retry)
+_NO_DATA_MARKERS = ("delisted", "no data", "not found", "no timezone", "no price data")
+
+
+def _download_error(ticker):
+    errors = getattr(getattr(yf, "shared", None), "_ERRORS", None) or {}
+    return errors.get(ticker.upper()) or errors.get(ticker)
+
+
+def fetch_daily(ticker, start=None, end=None):
+    """
+    Holt Tageskerzen via yfinance. Ohne 'start' wird die maximale
+    Historie geladen. 'end' ist wie bei yfinance exklusiv.
+    Gibt die Rohdaten (ggf. leer) zurück – Aufbereitung & Prüfung
+    übernimmt einmalig der HistoryStore (data_ingest.ingest_bars).
+    Leer = keine Daten für den Ticker; Provider-Störungen (Drosselung,
+    Timeout, ...) werden als ProviderError geworfen.
+    """
+    print(f"[DEBUG data_store] fetch_daily(ticker={ticker}, start={start}, end={end})")
+    with _YF_LOCK:
+        if start is None:
+            df = yf.download(ticker, period="max", interval='1d',
+                             progress=False, auto_adjust=False)
+        else:
+            df = yf.download(ticker, start=start, end=end, interval='1d',
+                             progress=False, auto_adjust=False)
+        error = _download_error(ticker) if df is None or df.empty else None
+
+    if df is None or df.empty:
+        if error and not any(m in str(error).lower() for m in _NO_DATA_MARKERS):
+            raise ProviderError(f"yfinance-Fehler für {ticker}: {error}")
+        return pd.DataFrame()
+    return df
+
+
+class LocalCsvProvider:
+    """
+    Lokaler Daten-Provider (Tests, Offline-Betrieb): liest '<TICKER>.csv'
+    aus 'directory' (Spalten Date, Open, High, Low, Close, ...) und
+    verhält sich wie fetch_daily (Rohdaten, Aufbereitung im HistoryStore).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __call__(self, ticker, start=None, end=None):
+        path = os.path.join(self.directory, f"{ticker}.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        df = pd.read_csv(path, parse_dates=['Date'], index_col='Date')
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index < pd.Timestamp(end)]
+        return df
+
+
+class LocalFirstProvider:
+    """
+    Lokale Historie zuerst (z.B. per data_import angelegt), nur die
+    fehlenden neueren Kerzen kommen vom 'remote'-Provider. Ist der
+    Provider nicht erreichbar, reicht der lokale Stand.
+    """
+
+    def __init__(self, local, remote):
+        self.local = local
+        self.remote = remote
+
+    def __call__(self, ticker, start=None, end=None):
+        df_local = self.local(ticker, start=start, end=end)
+        if df_local.empty:
+            return self.remote(ticker, start=start, end=end)
+
+        last_date = df_local.index[-1]
+        if end is not None and last_date >= pd.Timestamp(end) - timedelta(days=1):
+            return df_local
+        try:
+            df_new = self.remote(ticker, start=last_date.date(), end=end)
+        except ProviderError as e:
+            print(f"[DEBUG data_store] {ticker}: nur lokale Historie ({e})")
+            return df_local
+        if df_new is None or df_new.empty:
+            return df_local
+        # Beide Teile ins Standard-Schema, neuere Kerzen gewinnen (ingest: keep="last")
+        return pd.concat([normalize_bars(df_local), normalize_bars(df_new)])
+
+
+class HistoryStore:
+    """
+    Thread-sicherer In-Memory-Cache der vollen Tages-Historie je Ticker.
+
+    fetcher: callable(ticker, start=None, end=None) -> DataFrame
+    max_age: Sekunden, nach denen beim nächsten Zugriff neue Kerzen
+             nachgeladen werden.
+    clock:   liefert die aktuelle Zeit in Sekunden (für Tests austauschbar).
+    stale_while_revalidate:
+             True  => veraltete Daten sofort liefern (als 'stale' markiert,
+                      siehe status()) und im Hintergrund auffrischen
+             False => synchron auffrischen
+    dtype:   Float-Typ der gespeicherten Kerzen (float64 oder float32)
+    max_bytes: Speicherbudget aller Historien; darüber werden die am
+             längsten nicht genutzten Ticker verworfen (LRU) und bei
+             Bedarf neu geladen
+
+    Alle Daten laufen beim Eintritt einmal durch data_ingest.ingest_bars;
+    gespeicherte Historien sind daher immer sortiert, ohne Duplikate und
+    ohne NaN-Zeilen – der Zugriff (get_range) ist nur noch ein Slice.
+    """
+
+    def __init__(self, fetcher=fetch_daily, max_age=15 * 60, clock=time.time,
+                 stale_while_revalidate=True, dtype=np.float64, max_bytes=256 * 1024 * 1024):
+        self._fetcher = fetcher
+        self._max_age = max_age
+        self._clock = clock
+        self._swr = stale_while_revalidate
+        self._dtype = dtype
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self._sizes = {}
+        self.nbytes = 0
+        self._reports = {}
+        self._fetched_at = {}
+        self._versions = {}
+        self._last_error = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._ticker_locks = {}
+
+    def _ticker_lock(self, ticker):
+        # Ein Lock pro Ticker: ein langsamer Download blockiert nicht alle anderen
+        with self._lock:
+            if ticker not in self._ticker_locks:
+                self._ticker_locks[ticker] = threading.Lock()
+            return self._ticker_locks[ticker]
+
+    @staticmethod
+    def _max_gap_days(ticker):
+        return 1 if is_crypto(ticker) else DEFAULT_MAX_GAP_DAYS
+
+    def _ingest(self, ticker, raw):
+        df, report = ingest_bars(raw, ticker, dtype=self._dtype,
+                                 max_gap_days=self._max_gap_days(ticker))
+        # Bericht des letzten Imports/Nachladens (ersetzt, nicht angehängt)
+        self._reports[ticker] = report
+        return df
+
+    def _check_boundary(self, ticker, df_old, df_new):
+        """
+        Lücke zwischen gespeicherten und nachgeladenen Kerzen prüfen und
+        ggf. im Bericht des Nachladens vermerken.
+        """
+        if df_old.empty or df_new.empty:
+            return
+        gap = boundary_gap(df_old.index[-1], df_new, self._max_gap_days(ticker))
+        if gap.empty:
+            return
+        report = self._reports[ticker]
+        anomalies = pd.concat([report.anomalies, gap], ignore_index=True)
+        report = IngestReport(ticker, report.rows_in, report.rows_out,
+                              anomalies.sort_values("Date", kind="stable", ignore_index=True))
+        self._reports[ticker] = report
+        print(f"[DEBUG data_store] {report}")
+
+    def _put_frame(self, ticker, df, changed=True):
+        """
+        Speichert die Historie von 'ticker' als zuletzt genutzt und hält
+        das Speicherbudget ein. Die Version wird bei Änderungen immer
+        erhöht (auch nach Verdrängung und Neuladen), damit abgeleitete
+        Ergebnisse im calc_cache nie zu alten Daten passen.
+        """
+        size = int(df.memory_usage(deep=True, index=True).sum())
+        with self._lock:
+            self.nbytes += size - self._sizes.get(ticker, 0)
+            self._frames[ticker] = df
+            self._frames.move_to_end(ticker)
+            self._sizes[ticker] = size
+            self._fetched_at[ticker] = self._clock()
+            if changed:
+                self._versions[ticker] = self._versions.get(ticker, 0) + 1
+            self._last_error.pop(ticker, None)
+            while len(self._frames) > 1 and self.nbytes > self.max_bytes:
+                old_ticker = next(iter(self._frames))
+                if old_ticker == ticker:
+                    break
+                self._evict(old_ticker)
+
+    def _evict(self, ticker):
+        # Aufruf unter self._lock; Version bleibt erhalten (s. _put_frame)
+        self._frames.pop(ticker, None)
+        self.nbytes -= self._sizes.pop(ticker, 0)
+        self._fetched_at.pop(ticker, None)
+        self._reports.pop(ticker, None)
+        print(f"[DEBUG data_store] {ticker} verdrängt (Budget {self.max_bytes} Bytes)")
+
+    def _touch(self, ticker):
+        with self._lock:
+            if ticker in self._frames:
+                self._frames.move_to_end(ticker)
+
+    def get_history(self, ticker):
+        """
+        Volle Historie für 'ticker'. Lädt beim ersten Zugriff alles,
+        danach nur neue Kerzen, sobald der Cache älter als max_age ist.
+        Leeres DataFrame, falls der Provider nichts liefert.
+        Beim ersten Laden werden Provider-Fehler als ProviderError geworfen;
+        ist bereits etwas im Cache, wird stattdessen dieser Stand geliefert.
+        """
+        with self._ticker_lock(ticker):
+            with self._lock:
+                df = self._frames.get(ticker)
+                fetched_at = self._fetched_at.get(ticker)
+            if df is None:
+                df = self._ingest(ticker, self._fetcher(ticker))
+                self._put_frame(ticker, df)
+                return df
+
+        self._touch(ticker)
+        if self._clock() - fetched_at > self._max_age:
+            if self._swr:
+                self._refresh_in_background(ticker)
+            else:
+                try:
+                    df = self.refresh(ticker)
+                except ProviderError:
+                    pass  # Fehler ist in status() vermerkt, alter Stand bleibt
+        return df
+
+    def _refresh_in_background(self, ticker):
+        with self._lock:
+            if ticker in self._refreshing:
+                return
+            self._refreshing.add(ticker)
+
+        def _run():
+            try:
+                self.refresh(ticker)
+            except ProviderError:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(ticker)
+
+        threading.Thread(target=_run, name=f"refresh-{ticker}", daemon=True).start()
+
+    def refresh(self, ticker):
+        """
+        Lädt die Kerzen ab der letzten gespeicherten Kerze nach (die letzte
+        Kerze wird überschrieben, da sie beim letzten Abruf evtl. noch
+        unvollständig war). Bei Provider-Fehlern bleibt der alte Stand
+        erhalten, der Fehler wird vermerkt und weitergeworfen.
+        """
+        with self._ticker_lock(ticker):
+            df_old = self._frames.get(ticker)
+            try:
+                if df_old is None or df_old.empty:
+                    df_all = self._ingest(ticker, self._fetcher(ticker))
+                else:
+                    last_date = df_old.index[-1]
+                    df_new = self._ingest(ticker, self._fetcher(
+                        ticker, start=last_date.date(),
+                        end=(datetime.fromtimestamp(self._clock()) + timedelta(days=1)).date()))
+                    if df_new.empty:
+                        df_all = df_old
+                    else:
+                        df_kept = df_old[df_old.index < df_new.index[0]]
+                        self._check_boundary(ticker, df_kept, df_new)
+                        df_all = pd.concat([df_kept, df_new])
+            except ProviderError as e:
+                self._last_error[ticker] = str(e)
+                raise
+
+            # Version nur erhöhen, wenn sich die Daten wirklich geändert haben
+            self._put_frame(ticker, df_all, changed=df_old is None or not df_all.equals(df_old))
+            return df_all
+
+    def preload(self, ticker, df):
+        """
+        Übernimmt bereits aufbereitete Kerzen (z.B. die Shared-Memory-Sicht
+        eines Worker-Prozesses, data_shm) unverändert: ohne Kopie und ohne
+        erneuten Ingest. Zählt als frisch geladen.
+        """
+        with self._ticker_lock(ticker):
+            self._put_frame(ticker, df)
+
+    def get_range(self, ticker, start_date, end_date):
+        """
+        Ausschnitt [start_date, end_date) – gleiche Semantik wie
+        yf.download(start=..., end=...).
+        """
+        df = self.get_history(ticker)
+        # Index ist beim Ingest sortiert worden => binäre Suche statt Maske
+        i_start = df.index.searchsorted(pd.Timestamp(start_date), side="left")
+        i_end = df.index.searchsorted(pd.Timestamp(end_date), side="left")
+        return df.iloc[i_start:i_end]
+
+    def version(self, ticker):
+        """
+        Zähler, der sich bei jeder inhaltlichen Änderung der Historie von
+        'ticker' erhöht (0 = noch nicht geladen). Dient als Cache-Schlüssel
+        für abgeleitete Ergebnisse.
+        """
+        with self._lock:
+            return self._versions.get(ticker, 0)
+
+    def status(self, ticker):
+        """
+        Zustand des Cache-Eintrags:
+          stale      – älter als max_age oder letzte Auffrischung fehlgeschlagen
+          refreshing – Hintergrund-Auffrischung läuft
+          last_error – letzte Provider-Fehlermeldung (oder None)
+          age        – Sekunden seit dem letzten erfolgreichen Abruf
+        """
+        with self._lock:
+            fetched_at = self._fetched_at.get(ticker)
+            age = None if fetched_at is None else self._clock() - fetched_at
+            last_error = self._last_error.get(ticker)
+            return {
+                "stale": age is not None and (age > self._max_age or last_error is not None),
+                "refreshing": ticker in self._refreshing,
+                "last_error": last_error,
+                "age": age,
+            }
+
+    def ingest_report(self, ticker):
+        """
+        IngestReport (Auffälligkeiten der Daten) für 'ticker' oder None.
+        """
+        with self._lock:
+            return self._reports.get(ticker)
+
+    def memory_usage(self):
+        """
+        Speicherbedarf aller gespeicherten Historien in Bytes (beim
+        Speichern gemessen, siehe _put_frame).
+        """
+        with self._lock:
+            return self.nbytes
+
+    def tickers(self):
+        with self._lock:
+            return list(self._frames)
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Prozessweiter Standard-Speicher (von allen Streamlit-Sessions geteilt).
+    Ist HISTORY_DIR gesetzt, kommen die Kerzen zuerst aus der lokalen
+    Historie (<TICKER>.csv, siehe data_import), nur neuere aus dem Netz.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            fetcher = ResilientFetcher(fetch_daily, lock=_YF_LOCK)
+            history_dir = os.environ.get("HISTORY_DIR")
+            if history_dir:
+                fetcher = LocalFirstProvider(LocalCsvProvider(history_dir), fetcher)
+            _default_store = HistoryStore(fetcher=fetcher)
+        return _default_store
+
+
+def set_store(store):
+    """
+    Ersetzt den Standard-Speicher, z.B. durch einen HistoryStore mit
+    LocalCsvProvider für Tests oder Offline-Betrieb.
+    """
+    global _default_store
+    with _default_store_lock:
+        _default_store = store
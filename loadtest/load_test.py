@@ -0,0 +1,429 @@
+# load_test.py
+"""
+Lasttest für die Streamlit-App.
+
+Simuliert N gleichzeitige Sessions, die app.py über streamlit.testing
+(AppTest) ausführen: jede Session wählt wiederholt realistische Eingaben
+(beliebte Ticker häufiger, wechselnde Datums-/Modus-/Teiler-Kombinationen),
+klickt "Berechnen" und misst die Dauer bis zur Ergebnisseite (inkl.
+Warten auf den Hintergrund-Job).
+
+Daten kommen NICHT aus dem Netz, sondern aus einem lokalen Fake-Provider
+(synthetische Kurse oder ein CSV-Verzeichnis für LocalCsvProvider),
+optional mit künstlicher Latenz je Download.
+
+Ausgabe:
+  - Durchsatz (Reruns/s) und Fehleranzahl
+  - p50/p95/p99 je Stufe (Rerun gesamt, get_history, Modelle, Darstellung;
+    Stufen aus calc_timing)
+  - Speicherzuwachs (tracemalloc, max. RSS, data_store, Ergebnis-Cache)
+
+Aufruf:
+    python -m loadtest.load_test --sessions 8 --runs 20
+    python -m loadtest.load_test --sessions 16 --csv-dir daten/ --tickers AAPL MSFT --json last.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from calculations.calc_cache import get_result_cache
+from calculations.calc_memory import format_bytes
+from calculations.calc_timing import get_stage_timer
+from data.data_store import HistoryStore, LocalCsvProvider, get_store, set_store
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+DEFAULT_TICKERS = ["BTC-USD", "ETH-USD", "AAPL", "MSFT", "NVDA", "SAP.DE", "^GDAXI", "GC=F"]
+
+# shared_test_runtime greift auf interne Streamlit-Klassen zu (keine
+# öffentliche API) – getestet nur mit dieser Streamlit-Version (major.minor)
+TESTED_STREAMLIT_VERSION = "1.66"
+
+
+class SyntheticProvider:
+    """
+    Fake-Provider mit synthetischen Tageskerzen (geometrische Brownsche
+    Bewegung, pro Ticker reproduzierbar). Verhält sich wie fetch_daily.
+    latency: Sekunden Wartezeit je Abruf (simuliert den Download)
+    """
+
+    def __init__(self, start="2010-01-01", latency=0.0, end=None):
+        self.start = pd.Timestamp(start)
+        self.end = pd.Timestamp(end or date.today())
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, ticker, start=None, end=None):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+        idx = pd.date_range(self.start, self.end, freq="D", name="Date")
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0002, 0.02, len(idx))))
+        spread = np.abs(rng.normal(0.0, 0.015, len(idx))) + 0.002
+        df = pd.DataFrame({
+            "Open": close * (1 + rng.normal(0.0, 0.005, len(idx))),
+            "High": close * (1 + spread),
+            "Low": close * (1 - spread),
+            "Close": close,
+            "Volume": rng.integers(1000, 100000, len(idx)).astype(float),
+        }, index=idx)
+        df["High"] = df[["Open", "High", "Close"]].max(axis=1)
+        df["Low"] = df[["Open", "Low", "Close"]].min(axis=1)
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index < pd.Timestamp(end)]
+        return df
+
+
+@contextlib.contextmanager
+def shared_test_runtime():
+    """
+    AppTest setzt bei jedem Lauf die globale Runtime-Instanz (und die
+    Option global.appTest) und danach wieder zurück. Laufen mehrere
+    Sessions parallel im selben Prozess, verliert dadurch ein noch
+    laufendes Skript seine Runtime bzw. den Test-Modus. Für die Dauer des
+    Lasttests gibt es deshalb eine gemeinsame Ersatz-Instanz, und der
+    Test-Modus bleibt durchgehend aktiv.
+
+    Außerdem übersetzt AppTest das Skript bei jedem Lauf neu; paralleles
+    ast.parse ist in CPython nicht thread-sicher. Das Übersetzen wird daher
+    (wie im ScriptCache des echten Servers) serialisiert.
+
+    Beides geht nur über interne Streamlit-Module (streamlit.runtime.*),
+    die sich zwischen Versionen ändern. Mit einer anderen Version als
+    TESTED_STREAMLIT_VERSION bricht der Lasttest deshalb mit RuntimeError
+    ab, statt mit verfälschten Zahlen durchzulaufen.
+    """
+    import streamlit
+    installed = ".".join(streamlit.__version__.split(".")[:2])
+    if installed != TESTED_STREAMLIT_VERSION:
+        raise RuntimeError(
+            f"Lasttest nutzt interne Streamlit-APIs und ist nur mit Streamlit "
+            f"{TESTED_STREAMLIT_VERSION}.x getestet (installiert: {streamlit.__version__})."
+        )
+
+    from unittest.mock import MagicMock
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1.util import patch_config_options
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    fallback = MagicMock(spec=Runtime)
+    fallback.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    fallback.dataframe_source_mgr = DataframeSourceManager()
+    fallback.cache_storage_manager = MemoryCacheStorageManager()
+
+    original_get_bytecode = ScriptCache.get_bytecode
+    compile_lock = threading.Lock()
+
+    def get_bytecode(self, script_path):
+        with compile_lock:
+            return original_get_bytecode(self, script_path)
+
+    original_instance = Runtime.__dict__["instance"]
+    original_exists = Runtime.__dict__["exists"]
+    Runtime.instance = classmethod(lambda cls: cls._instance or fallback)
+    Runtime.exists = classmethod(lambda cls: True)
+    ScriptCache.get_bytecode = get_bytecode
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        Runtime.instance = original_instance
+        Runtime.exists = original_exists
+        ScriptCache.get_bytecode = original_get_bytecode
+
+
+def _sidebar_widget(at, kind, label):
+    for w in getattr(at.sidebar, kind):
+        if w.label == label:
+            return w
+    raise KeyError(f"Sidebar-Element '{label}' ({kind}) nicht gefunden.")
+
+
+def random_inputs(rng, tickers, base_date):
+    """
+    Eine realistische Eingabe-Kombination: beliebte Ticker (vorne in der
+    Liste) kommen häufiger vor, Datum meist heute oder wenige Tage zurück.
+    """
+    weights = 1.0 / np.arange(1, len(tickers) + 1)
+    return {
+        "ticker": tickers[rng.choice(len(tickers), p=weights / weights.sum())],
+        "analysis_date": base_date - timedelta(days=int(rng.choice(5, p=[0.6, 0.2, 0.1, 0.05, 0.05]))),
+        "mode_choice": str(rng.choice(["hoch", "tief"])),
+        "volatility": str(rng.choice(["normal", "hoch"], p=[0.8, 0.2])),
+        "vj_divider": int(rng.choice([8, 16])),
+        "vm_divider": int(rng.choice([8, 16])),
+        "small_div_index": int(rng.choice(6, p=[0.05, 0.15, 0.5, 0.15, 0.1, 0.05])),
+        "anchor_periods": int(rng.choice([0, 2], p=[0.8, 0.2])),
+        "show_longrange": bool(rng.random() < 0.1),
+    }
+
+
+def apply_inputs(at, inputs):
+    """
+    Setzt die Formular-Felder der Sidebar und klickt "Berechnen".
+    """
+    _sidebar_widget(at, "text_input", "Wertpapier (Ticker)").input(inputs["ticker"])
+    _sidebar_widget(at, "date_input", "Gesuchtes Datum").set_value(inputs["analysis_date"])
+    _sidebar_widget(at, "radio", "Suchmodus").set_value(inputs["mode_choice"])
+    _sidebar_widget(at, "radio", "Volatilität").set_value(inputs["volatility"])
+    _sidebar_widget(at, "radio", "Teiler Vorjahr").set_value(inputs["vj_divider"])
+    _sidebar_widget(at, "radio", "Teiler Vormonat").set_value(inputs["vm_divider"])
+    _sidebar_widget(at, "selectbox", "Kleiner Teiler").select_index(inputs["small_div_index"])
+    _sidebar_widget(at, "number_input", "Weitere Anker (Vorperioden je Art)").set_value(inputs["anchor_periods"])
+    _sidebar_widget(at, "checkbox", "Langfrist-Chart anzeigen").set_value(inputs["show_longrange"])
+    _sidebar_widget(at, "button", "Berechnen").click()
+
+
+def _run_until_results(at, timeout):
+    """
+    Rerun + Warten auf den Hintergrund-Job (calc_jobs) – AppTest führt die
+    Fortschritts-Fragmente nicht selbst aus, daher wird wie im Browser
+    erneut ausgeführt, bis die Ergebnisse angezeigt werden.
+    """
+    at.run()
+    job = at.session_state["model_job"] if "model_job" in at.session_state else None
+    if job is not None and not job.done:
+        job.wait(timeout)
+        at.run()
+
+
+def run_session(session_id, runs, tickers, base_date, seed, timeout, think_time, errors):
+    """
+    Eine simulierte Session: Startseite laden, dann 'runs' Berechnungen.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = np.random.default_rng(seed + session_id)
+    timer = get_stage_timer()
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    try:
+        at.run()
+    except Exception as e:
+        errors.append((session_id, "start", repr(e)))
+        return
+
+    for i in range(runs):
+        try:
+            apply_inputs(at, random_inputs(rng, tickers, base_date))
+        except KeyError as e:
+            # Sidebar fehlt (vorheriger Lauf abgebrochen) => Session neu laden
+            errors.append((session_id, i, repr(e)))
+            at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+            at.run()
+            continue
+        t0 = time.perf_counter()
+        try:
+            _run_until_results(at, timeout)
+        except Exception as e:
+            errors.append((session_id, i, repr(e)))
+            continue
+        finally:
+            timer.record("rerun", time.perf_counter() - t0)
+        if len(at.exception):
+            errors.append((session_id, i, at.exception[0].value))
+        elif len(at.error):
+            errors.append((session_id, i, at.error[0].value))
+        if think_time:
+            time.sleep(rng.exponential(think_time))
+
+
+def _drop_missing_ctx_warning(record):
+    return "missing ScriptRunContext" not in record.getMessage()
+
+
+@contextlib.contextmanager
+def _environ(name, value):
+    """
+    Setzt eine Umgebungsvariable und stellt danach den alten Zustand wieder her.
+    """
+    old = os.environ.get(name)
+    os.environ[name] = value
+    try:
+        yield
+    finally:
+        if old is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = old
+
+
+def _max_rss_bytes():
+    """
+    Max. RSS des Prozesses in Bytes (ru_maxrss: macOS in Bytes, Linux in KB).
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def run_load_test(sessions=4, runs=10, tickers=None, provider=None, base_date=None,
+                  seed=0, timeout=120, think_time=0.0, trace_memory=True, quiet=True):
+    """
+    Führt den Lasttest aus und gibt die Kennzahlen als dict zurück.
+    Der data_store wird durch einen frischen HistoryStore mit 'provider'
+    ersetzt, Ergebnis-Cache und Stufen-Messungen werden geleert.
+    """
+    # Kein Hintergrund-Prefetch: er würde die Messung verfälschen
+    with _environ("PREFETCH_WATCHLIST", ""):
+        return _run_load_test(sessions, runs, tickers, provider, base_date,
+                              seed, timeout, think_time, trace_memory, quiet)
+
+
+def _run_load_test(sessions, runs, tickers, provider, base_date,
+                   seed, timeout, think_time, trace_memory, quiet):
+    tickers = list(tickers or DEFAULT_TICKERS)
+    base_date = base_date or date.today()
+    # Lasttest-Threads laufen ohne ScriptRunContext – die Warnung ist
+    # erwartet, die Ausgabe soll nur echte Auffälligkeiten zeigen. (Filter
+    # statt Log-Level: Streamlit setzt die Level beim Config-Patch zurück.)
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+        _drop_missing_ctx_warning
+    )
+
+    set_store(HistoryStore(fetcher=provider or SyntheticProvider(), stale_while_revalidate=False))
+    get_result_cache().clear()
+    timer = get_stage_timer()
+    timer.reset()
+
+    # Aufwärmen: einmal die Startseite laden, damit einmalige Importe von
+    # Streamlit & App-Modulen nicht als Speicherzuwachs zählen
+    from streamlit.testing.v1 import AppTest
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+
+    if trace_memory:
+        tracemalloc.start()
+    mem_start = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+
+    errors = []
+    threads = [
+        threading.Thread(target=run_session, name=f"loadtest-session-{s}",
+                         args=(s, runs, tickers, base_date, seed, timeout, think_time, errors))
+        for s in range(sessions)
+    ]
+    # Die Debug-Ausgaben der App würden die Messung dominieren
+    sink = io.StringIO() if quiet else None
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext(), shared_test_runtime():
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    wall = time.perf_counter() - t0
+
+    memory = {
+        "rss_max_bytes": _max_rss_bytes(),
+        "store_bytes": get_store().memory_usage(),
+        "store_budget": get_store().max_bytes,
+        "result_cache_bytes": get_result_cache().nbytes,
+        "result_cache_entries": len(get_result_cache()),
+    }
+    if trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory.update(traced_growth_bytes=current - mem_start, traced_peak_bytes=peak - mem_start)
+
+    total_runs = len(timer.snapshot().get("rerun", []))
+    return {
+        "sessions": sessions,
+        "runs": total_runs,
+        "errors": errors,
+        "wall_seconds": wall,
+        "throughput_runs_per_s": total_runs / wall if wall > 0 else 0.0,
+        "stages": timer.summary(),
+        "memory": memory,
+    }
+
+
+def format_report(result):
+    lines = [
+        f"Sessions: {result['sessions']}  Reruns: {result['runs']}  "
+        f"Fehler: {len(result['errors'])}  Dauer: {result['wall_seconds']:.1f}s  "
+        f"Durchsatz: {result['throughput_runs_per_s']:.2f} Reruns/s",
+        "",
+        f"{'Stufe':<22}{'Anzahl':>8}{'Mittel':>10}{'p50':>10}{'p95':>10}{'p99':>10}   (ms)",
+    ]
+    # Rerun gesamt zuerst, danach die Stufen nach p95 absteigend
+    stages = sorted(result["stages"].items(), key=lambda kv: (kv[0] != "rerun", -kv[1]["p95_ms"]))
+    for stage, row in stages:
+        lines.append(f"{stage:<22}{row['count']:>8}{row['mean_ms']:>10.1f}{row['p50_ms']:>10.1f}"
+                     f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+
+    mem = result["memory"]
+    lines += ["", "Speicher:"]
+    if "traced_growth_bytes" in mem:
+        lines.append(f"  Zuwachs (tracemalloc) : {format_bytes(mem['traced_growth_bytes'])} "
+                     f"(Peak {format_bytes(mem['traced_peak_bytes'])})")
+    lines.append(f"  Max. RSS              : {format_bytes(mem['rss_max_bytes'])}")
+    lines.append(f"  Kursdaten (Store)     : {format_bytes(mem['store_bytes'])} / "
+                 f"{format_bytes(mem['store_budget'])}")
+    lines.append(f"  Ergebnis-Cache        : {format_bytes(mem['result_cache_bytes'])} "
+                 f"({mem['result_cache_entries']} Einträge)")
+
+    for session_id, run, msg in result["errors"][:10]:
+        lines.append(f"  Fehler Session {session_id} / Lauf {run}: {msg}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lasttest der Gannigma-App mit simulierten Sessions")
+    parser.add_argument("--sessions", type=int, default=4, help="Anzahl gleichzeitiger Sessions")
+    parser.add_argument("--runs", type=int, default=10, help="Berechnungen je Session")
+    parser.add_argument("--tickers", nargs="*", help="Ticker-Auswahl (beliebteste zuerst)")
+    parser.add_argument("--csv-dir", help="Verzeichnis mit <TICKER>.csv statt synthetischer Kurse")
+    parser.add_argument("--latency", type=float, default=0.0, help="Künstliche Download-Latenz (s)")
+    parser.add_argument("--date", help="Basis-Analysedatum (YYYY-MM-DD), Standard: heute")
+    parser.add_argument("--think", type=float, default=0.0, help="Mittlere Denkpause je Session (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="Timeout je Rerun (s)")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Speicherverfolgung abschalten (schneller)")
+    parser.add_argument("--verbose", action="store_true", help="Debug-Ausgaben der App anzeigen")
+    parser.add_argument("--json", help="Ergebnis zusätzlich als JSON schreiben")
+    args = parser.parse_args(argv)
+
+    if args.csv_dir:
+        provider = LocalCsvProvider(args.csv_dir)
+    else:
+        provider = SyntheticProvider(latency=args.latency)
+    base_date = pd.Timestamp(args.date).date() if args.date else date.today()
+
+    result = run_load_test(
+        sessions=args.sessions,
+        runs=args.runs,
+        tickers=args.tickers,
+        provider=provider,
+        base_date=base_date,
+        seed=args.seed,
+        timeout=args.timeout,
+        think_time=args.think,
+        trace_memory=not args.no_tracemalloc,
+        quiet=not args.verbose,
+    )
+    print(format_report(result))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, default=str)
+
+
+if __name__ == '__main__':
+    main()
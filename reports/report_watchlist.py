@@ -0,0 +1,322 @@
+# report_watchlist.py
+"""
+Report-Generator für eine Watchlist.
+
+Berechnet für jeden Ticker alle drei Modelle (360°, Vorjahr, Vormonat)
+und schreibt
+  - eine einzelne, eigenständige HTML-Datei (Chart + Level je Ticker)
+  - eine Excel-Arbeitsmappe (Übersicht + Level im Long-Format)
+
+Die Berechnung und das Rendern der Charts laufen parallel in
+Worker-Prozessen. Die Kerzen lädt der Haupt-Prozess einmal über den
+data_store und legt sie in Shared Memory (data_shm); an die Worker geht
+nur ein kleiner Handle, kein gepickeltes DataFrame. Jedes Segment wird
+freigegeben, sobald der Job des Tickers fertig ist. Die Plotly-JS-Bibliothek wird nur EINMAL in den
+HTML-Kopf eingebettet (bzw. per CDN referenziert), die Charts selbst
+sind nur noch kleine <div>/<script>-Blöcke.
+
+Aufruf:
+    python -m reports.report_watchlist BTC-USD ETH-USD AAPL --out morgen
+    python -m reports.report_watchlist --watchlist watchlist.txt --date 2024-05-02
+"""
+
+import argparse
+import html
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+
+import pandas as pd
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from calculations.calc_pipeline import DEFAULT_PARAMS, run_all_models, build_display_data
+from data.data_shm import SharedBarsPool, call_with_bars
+from data.data_store import HistoryStore, get_store, set_store
+from ui.ui_charts import build_level_chart
+
+# Gleiche plotly.js-Version wie die installierte plotly-Bibliothek (Figuren-JSON passt)
+PLOTLY_CDN_URL = f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+
+
+def _format_price(value):
+    # Lazy-Import: ui_display zieht Streamlit nach, das brauchen nur
+    # Haupt-Prozess & HTML-Zusammenbau, nicht die Worker.
+    from ui.ui_display import format_price
+    return format_price(value)
+
+
+def build_ticker_page(ticker, analysis_date, params=None):
+    """
+    Worker-Funktion: rechnet alle Modelle für EINEN Ticker und rendert
+    den Chart als HTML-Fragment (ohne Plotly-JS).
+    Gibt nur kleine, gut picklebare Daten zurück (Skalare, Listen, Strings).
+    Fehler (z.B. falsches Kürzel) werden im Ergebnis vermerkt, damit ein
+    einzelner Ticker nicht den ganzen Report abbricht.
+    """
+    p = dict(DEFAULT_PARAMS)
+    if params:
+        p.update(params)
+
+    page = {"ticker": ticker, "error": None}
+    try:
+        result_360, result_vorjahr, result_vormonat = run_all_models(ticker, analysis_date, p)
+    except Exception as e:
+        page["error"] = str(e)
+        return page
+
+    basisdaten, ergebnisse = build_display_data(
+        result_360, result_vorjahr, result_vormonat, analysis_date, p["mode_choice"]
+    )
+
+    chart_html = ""
+    df_chart = ergebnisse.pop("df_chart")
+    if df_chart is not None:
+        fig = build_level_chart(
+            df_chart,
+            basisdaten["range_unten"],
+            basisdaten["range_oben"],
+            ergebnisse["preise_inrange_360"],
+            ergebnisse["preise_inrange_vorjahr"],
+            ergebnisse["preise_inrange_vormonat"],
+            height=450,
+        )
+        chart_html = fig.to_html(full_html=False, include_plotlyjs=False,
+                                 div_id=f"chart-{ticker}")
+
+    basisdaten["vortageskerze"] = str(basisdaten["vortageskerze"])
+    page["basisdaten"] = basisdaten
+    page["ergebnisse"] = ergebnisse
+    page["chart_html"] = chart_html
+    return page
+
+
+def _no_download(ticker, start=None, end=None):
+    # Worker laden nie selbst nach – alle Kerzen kommen aus dem Shared Memory
+    return pd.DataFrame()
+
+
+def _page_from_bars(df, ticker, analysis_date, params):
+    store = HistoryStore(fetcher=_no_download, max_age=float("inf"))
+    store.preload(ticker, df)
+    set_store(store)
+    try:
+        return build_ticker_page(ticker, analysis_date, params)
+    finally:
+        set_store(None)
+
+
+def build_ticker_page_shared(handle, analysis_date, params=None):
+    """
+    Worker-Funktion: wie build_ticker_page, die Kerzen kommen aber ohne
+    Kopie aus dem Shared-Memory-Segment von 'handle' (data_shm).
+    """
+    return call_with_bars(handle, _page_from_bars, handle.ticker, analysis_date, params)
+
+
+def build_pages(tickers, analysis_date, params=None, max_workers=None):
+    """
+    Berechnet & rendert alle Ticker parallel über einen Prozess-Pool.
+    Reihenfolge der Watchlist bleibt erhalten, doppelte Ticker werden nur
+    einmal gerechnet.
+    """
+    unique = list(dict.fromkeys(tickers))
+    if max_workers == 1 or len(unique) <= 1:
+        pages = {t: build_ticker_page(t, analysis_date, params) for t in unique}
+        return [pages[t] for t in tickers]
+
+    pages = {}
+    store = get_store()
+    with SharedBarsPool() as pool, ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for t in unique:
+            try:
+                df = store.get_history(t)
+            except Exception as e:
+                pages[t] = {"ticker": t, "error": str(e)}
+                continue
+            # Worker starten schon, während weitere Ticker geladen werden
+            handle = pool.publish(t, df)
+            futures[executor.submit(build_ticker_page_shared, handle, analysis_date, params)] = t
+
+        for future in as_completed(futures):
+            t = futures[future]
+            pages[t] = future.result()
+            pool.release(t)
+
+    return [pages[t] for t in tickers]
+
+
+def _level_list_html(title, values, color):
+    items = "".join(f"<li>{html.escape(_format_price(v))}</li>" for v in values)
+    return f"<div class='col'><h4 style='color:{color};'>{title}</h4><ul>{items}</ul></div>"
+
+
+def render_html(pages, analysis_date, plotlyjs="inline"):
+    """
+    Setzt alle Ticker-Seiten zu EINER HTML-Datei zusammen.
+    plotlyjs="inline" => Plotly-JS einmal eingebettet (offline lesbar)
+    plotlyjs="cdn"    => nur <script src=...> (sehr klein, braucht Internet)
+    """
+    if plotlyjs == "cdn":
+        js_block = f"<script src='{PLOTLY_CDN_URL}'></script>"
+    else:
+        js_block = f"<script type='text/javascript'>{get_plotlyjs()}</script>"
+
+    toc = "".join(
+        f"<a href='#t-{html.escape(p['ticker'])}'>{html.escape(p['ticker'])}</a> "
+        for p in pages
+    )
+
+    sections = []
+    for p in pages:
+        ticker = html.escape(p["ticker"])
+        if p["error"]:
+            sections.append(
+                f"<section id='t-{ticker}'><h2>{ticker}</h2>"
+                f"<p class='error'>{html.escape(p['error'])}</p></section>"
+            )
+            continue
+
+        b = p["basisdaten"]
+        e = p["ergebnisse"]
+        sections.append(
+            f"<section id='t-{ticker}'>"
+            f"<h2>{ticker}</h2>"
+            f"<p><b>Vortageskerze</b>: {html.escape(b['vortageskerze'])} | "
+            f"<b>ATR</b>: {_format_price(b['atr_value'])} | "
+            f"<b>Bereich</b>: {_format_price(b['range_unten'])} – {_format_price(b['range_oben'])} | "
+            f"<b>Modus</b>: {html.escape(str(b['mode_choice']))}</p>"
+            f"<div class='row'>"
+            + _level_list_html("In-Range 360°", e["preise_inrange_360"], "blue")
+            + _level_list_html("In-Range Vormonat", e["preise_inrange_vormonat"], "blue")
+            + _level_list_html("In-Range Vorjahr", e["preise_inrange_vorjahr"], "blue")
+            + _level_list_html("Expansion 360°", e["preise_ausserhalb_360"], "green")
+            + _level_list_html("Expansion Vormonat", e["preise_ausserhalb_vormonat"], "green")
+            + _level_list_html("Expansion Vorjahr", e["preise_ausserhalb_vorjahr"], "green")
+            + "</div>"
+            + p["chart_html"]
+            + "</section>"
+        )
+
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>Gannigma Level-Report {analysis_date}</title>"
+        f"{js_block}"
+        "<style>body{font-family:sans-serif;margin:2em;} .row{display:flex;flex-wrap:wrap;}"
+        " .col{margin-right:2em;} section{border-top:1px solid #ccc;padding-top:1em;}"
+        " .error{color:red;}</style>"
+        "</head><body>"
+        f"<h1>Gannigma Level-Report {analysis_date}</h1>"
+        f"<p>{toc}</p>"
+        + "".join(sections)
+        + "</body></html>"
+    )
+
+
+def build_excel_frames(pages):
+    """
+    Liefert (df_overview, df_levels) für die Excel-Arbeitsmappe.
+    """
+    overview_rows = []
+    level_rows = []
+    level_keys = [
+        ("360°", "In-Range", "preise_inrange_360"),
+        ("360°", "Expansion", "preise_ausserhalb_360"),
+        ("Vormonat", "In-Range", "preise_inrange_vormonat"),
+        ("Vormonat", "Expansion", "preise_ausserhalb_vormonat"),
+        ("Vorjahr", "In-Range", "preise_inrange_vorjahr"),
+        ("Vorjahr", "Expansion", "preise_ausserhalb_vorjahr"),
+    ]
+
+    for p in pages:
+        if p["error"]:
+            overview_rows.append({"Ticker": p["ticker"], "Fehler": p["error"]})
+            continue
+        b = p["basisdaten"]
+        e = p["ergebnisse"]
+        overview_rows.append({
+            "Ticker": p["ticker"],
+            "Vortageskerze": b["vortageskerze"],
+            "ATR": b["atr_value"],
+            "Bereich unten": b["range_unten"],
+            "Bereich oben": b["range_oben"],
+            "Modus": b["mode_choice"],
+            "VM Hoch": e["vm_high"],
+            "VM Tief": e["vm_low"],
+            "VM Schritt": e["vm_schritt"],
+            "VJ Hoch": e["vj_high"],
+            "VJ Tief": e["vj_low"],
+            "VJ Schritt": e["vj_schritt"],
+            "Fehler": None,
+        })
+        for modell, typ, key in level_keys:
+            for preis in e[key]:
+                level_rows.append({"Ticker": p["ticker"], "Modell": modell, "Typ": typ, "Preis": preis})
+
+    df_overview = pd.DataFrame(overview_rows)
+    df_levels = pd.DataFrame(level_rows, columns=["Ticker", "Modell", "Typ", "Preis"])
+    return df_overview, df_levels
+
+
+def write_excel(pages, path):
+    df_overview, df_levels = build_excel_frames(pages)
+    with pd.ExcelWriter(path) as writer:
+        df_overview.to_excel(writer, sheet_name="Übersicht", index=False)
+        df_levels.to_excel(writer, sheet_name="Level", index=False)
+
+
+def generate_report(tickers, analysis_date, out_prefix, params=None, max_workers=None,
+                    plotlyjs="inline"):
+    """
+    Komplett-Lauf: rechnen, HTML & Excel schreiben.
+    Gibt (html_path, xlsx_path) zurück.
+    """
+    print(f"[DEBUG report] generate_report({len(tickers)} Ticker, date={analysis_date})")
+    pages = build_pages(tickers, analysis_date, params, max_workers)
+
+    html_path = f"{out_prefix}.html"
+    xlsx_path = f"{out_prefix}.xlsx"
+    with open(html_path, "w", encoding="utf-8") as f:
+        f.write(render_html(pages, analysis_date, plotlyjs))
+    write_excel(pages, xlsx_path)
+
+    n_err = sum(1 for p in pages if p["error"])
+    print(f"[DEBUG report] fertig: {html_path}, {xlsx_path} ({n_err} Fehler)")
+    return html_path, xlsx_path
+
+
+def read_watchlist(path):
+    """
+    Eine Zeile pro Ticker, '#' leitet Kommentare ein.
+    """
+    tickers = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                tickers.append(line)
+    return tickers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gannigma Level-Report für eine Watchlist")
+    parser.add_argument("tickers", nargs="*", help="Ticker, z.B. BTC-USD AAPL")
+    parser.add_argument("--watchlist", help="Datei mit einem Ticker pro Zeile")
+    parser.add_argument("--date", help="Analysedatum (YYYY-MM-DD), Standard: heute")
+    parser.add_argument("--out", default="report", help="Ausgabe-Präfix (ohne Endung)")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Worker-Prozesse")
+    parser.add_argument("--plotlyjs", choices=["inline", "cdn"], default="inline")
+    args = parser.parse_args(argv)
+
+    tickers = list(args.tickers)
+    if args.watchlist:
+        tickers += read_watchlist(args.watchlist)
+    if not tickers:
+        parser.error("Keine Ticker angegeben.")
+
+    analysis_date = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else date.today()
+    generate_report(tickers, analysis_date, args.out, max_workers=args.workers,
+                    plotlyjs=args.plotlyjs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# ui_charts.py
+
+import plotly.graph_objects as go
+
+
+def build_level_chart(df_chart, lb_val, ub_val, inrange_360, inrange_vorjahr, inrange_vormonat,
+                      height=500):
+    """
+    Baut den Kerzen-Chart mit ATR-Range und In-Range-Linien.
+    Ohne Streamlit-Abhängigkeit, damit der Chart auch im Report-Generator
+    (Worker-Prozesse) gebaut werden kann.
+    """
+    fig = go.Figure(data=[go.Candlestick(
+        x=df_chart.index,
+        open=df_chart['Open'],
+        high=df_chart['High'],
+        low=df_chart['Low'],
+        close=df_chart['Close'],
+        name="OHLC"
+    )])
+
+    if lb_val is not None:
+        fig.add_hline(y=lb_val, line=dict(color="black", dash="dash"),
+                      annotation_text="Range-Untergrenze")
+    if ub_val is not None:
+        fig.add_hline(y=ub_val, line=dict(color="black", dash="dash"),
+                      annotation_text="Range-Obergrenze")
+
+    for preis in inrange_360:
+        fig.add_hline(y=preis, line=dict(color="green"), annotation_text="360°")
+    for preis in inrange_vorjahr:
+        fig.add_hline(y=preis, line=dict(color="red"), annotation_text="Vorjahr")
+    for preis in inrange_vormonat:
+        fig.add_hline(y=preis, line=dict(color="blue"), annotation_text="Vormonat")
+
+    fig.update_layout(
+        height=height,
+        xaxis_rangeslider_visible=False,
+    )
+    return fig
+
+
+# Ab dieser Kerzenanzahl wird statt Candlestick ein WebGL-Band gezeichnet
+WEBGL_MIN_BARS = 400
+
+
+def build_longrange_chart(df_plot, lb_val, ub_val, inrange_360, inrange_vorjahr, inrange_vormonat,
+                          height=600):
+    """
+    Langfrist-Chart über bereits verdichtete OHLC-Daten (calc_downsample).
+    Viele Eimer => WebGL-Traces (Scattergl: High/Low-Band + Close),
+    wenige Kerzen => normaler Candlestick. Level wie im Block-3-Chart.
+    """
+    if len(df_plot) >= WEBGL_MIN_BARS:
+        fig = go.Figure()
+        fig.add_trace(go.Scattergl(
+            x=df_plot.index, y=df_plot['Low'], mode='lines',
+            line=dict(width=0.5, color='gray'), name='Tief', showlegend=False
+        ))
+        fig.add_trace(go.Scattergl(
+            x=df_plot.index, y=df_plot['High'], mode='lines',
+            line=dict(width=0.5, color='gray'), fill='tonexty',
+            fillcolor='rgba(128,128,128,0.3)', name='Hoch-Tief'
+        ))
+        fig.add_trace(go.Scattergl(
+            x=df_plot.index, y=df_plot['Close'], mode='lines',
+            line=dict(width=1, color='black'), name='Schluss'
+        ))
+    else:
+        fig = go.Figure(data=[go.Candlestick(
+            x=df_plot.index,
+            open=df_plot['Open'],
+            high=df_plot['High'],
+            low=df_plot['Low'],
+            close=df_plot['Close'],
+            name="OHLC"
+        )])
+
+    if lb_val is not None:
+        fig.add_hline(y=lb_val, line=dict(color="black", dash="dash"))
+    if ub_val is not None:
+        fig.add_hline(y=ub_val, line=dict(color="black", dash="dash"))
+    for preis in inrange_360:
+        fig.add_hline(y=preis, line=dict(color="green", width=1))
+    for preis in inrange_vorjahr:
+        fig.add_hline(y=preis, line=dict(color="red", width=1))
+    for preis in inrange_vormonat:
+        fig.add_hline(y=preis, line=dict(color="blue", width=1))
+
+    fig.update_layout(
+        height=height,
+        xaxis_rangeslider_visible=False,
+    )
+    return fig
@@ -0,0 +1,198 @@
+# ui_dashboard.py
+
+import time
+from datetime import date
+
+import streamlit as st
+
+from calculations.calc_dashboard import (
+    DASHBOARD_COLUMNS, dashboard_frame, filter_dashboard, page_count, paginate,
+    parse_watchlist, run_dashboard_job
+)
+from calculations.calc_jobs import get_job_runner
+from calculations.calc_pipeline import DEFAULT_PARAMS
+from calculations.calc_prefetch import watchlist_from_env
+from ui.ui_progress import POLL_SECONDS
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Sekunden, die ein Lauf direkt abgewartet wird (alles im Cache => sofort fertig)
+DASHBOARD_FAST_PATH_SECONDS = 0.5
+
+# Teilergebnisse während der Berechnung: nur die zuletzt fertigen Zeilen anzeigen
+PARTIAL_ROWS = 25
+
+
+def _column_config():
+    config = {}
+    for col in DASHBOARD_COLUMNS:
+        if col.endswith("%"):
+            config[col] = st.column_config.NumberColumn(col, format="%.1f")
+        elif col.endswith("In-Range"):
+            config[col] = st.column_config.NumberColumn(col, format="%d")
+        elif col not in ("Ticker", "Fehler"):
+            config[col] = st.column_config.NumberColumn(col, format="localized")
+    return config
+
+
+def get_dashboard_watchlist():
+    """
+    Watchlist-Eingabe als Formular (Freitext). Vorbelegt mit der
+    Prefetch-Watchlist (PREFETCH_WATCHLIST), sonst mit dem Standard-Ticker.
+    Gibt die zuletzt abgeschickte Ticker-Liste zurück (leer, solange nichts
+    abgeschickt wurde).
+    """
+    default = ", ".join(watchlist_from_env() or [DEFAULT_PARAMS["ticker"]])
+    with st.form("watchlist"):
+        text = st.text_area(
+            "Watchlist (Ticker)",
+            value=default,
+            help="Ticker getrennt durch Komma, Leerzeichen oder Zeilenumbruch."
+        )
+        submitted = st.form_submit_button("Watchlist rechnen")
+
+    if submitted:
+        st.session_state["dashboard_tickers"] = parse_watchlist(text)
+        st.session_state["dashboard_submit"] = st.session_state.get("dashboard_submit", 0) + 1
+    return st.session_state.get("dashboard_tickers", [])
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def display_dashboard_progress(job, rows):
+    """
+    Fortschritt des Dashboard-Laufs inkl. der schon fertigen Zeilen.
+    Nur dieses Fragment wird neu ausgeführt; am Ende wird die Seite neu
+    aufgebaut und zeigt die volle Tabelle.
+    """
+    job.touch()
+    if job.done:
+        st.rerun()
+
+    n_done = len(rows)
+    if job.cancelled:
+        text = f"Wird abgebrochen ({n_done}/{len(job.stages)} Ticker) ..."
+    else:
+        text = f"{n_done}/{len(job.stages)} Ticker berechnet ..."
+    st.progress(job.progress, text=text)
+    st.caption(f"Job {job.id} läuft seit {time.time() - job.submitted_at:.0f}s")
+
+    if not job.cancelled and st.button("Abbrechen", key="dashboard_abbrechen"):
+        job.cancel()
+
+    if n_done:
+        st.dataframe(dashboard_frame(rows[-PARTIAL_ROWS:]), hide_index=True,
+                     column_config=_column_config(), width="stretch")
+
+
+@st.fragment
+def display_dashboard_table(df):
+    """
+    Sortieren, Filtern und Blättern als Fragment: eine neue Seite oder ein
+    anderer Filter führt nur dieses Fragment erneut aus, nicht die App.
+    An die Oberfläche geht immer nur die aktuelle Seite.
+    """
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        query = st.text_input("Ticker-Filter", key="dashboard_query")
+        hide_errors = st.checkbox("Ticker mit Fehler ausblenden", key="dashboard_hide_errors")
+    with col2:
+        max_distance = st.number_input(
+            "Max. Abstand zum nächsten Level (%)",
+            min_value=0.0,
+            value=0.0,
+            step=0.5,
+            key="dashboard_max_distance",
+            help="0 = kein Filter"
+        )
+        page_size = st.selectbox("Zeilen je Seite", options=PAGE_SIZES, key="dashboard_page_size")
+    with col3:
+        sortable = [c for c in DASHBOARD_COLUMNS if c != "Fehler"]
+        sort_by = st.selectbox("Sortieren nach", options=sortable, key="dashboard_sort_by")
+        descending = st.checkbox("Absteigend", key="dashboard_descending")
+
+    # "Ticker" aufsteigend = Reihenfolge der Watchlist (nicht alphabetisch)
+    view = filter_dashboard(
+        df,
+        query=query,
+        max_distance=max_distance or None,
+        hide_errors=hide_errors,
+        sort_by=sort_by if sort_by != "Ticker" or descending else None,
+        ascending=not descending
+    )
+
+    # Nach einem engeren Filter kann die gemerkte Seite zu groß sein
+    pages = page_count(len(view), page_size)
+    if st.session_state.get("dashboard_page", 1) > pages:
+        st.session_state["dashboard_page"] = pages
+    page = st.number_input(f"Seite (von {pages})", min_value=1, max_value=pages,
+                           key="dashboard_page")
+    st.caption(f"{len(view)} von {len(df)} Tickern | Seite {page}/{pages}")
+
+    st.dataframe(paginate(view, page, page_size), hide_index=True,
+                 column_config=_column_config(), width="stretch")
+
+    st.download_button(
+        "Tabelle als CSV",
+        data=view.to_csv(index=False, sep=";", decimal=","),
+        file_name="watchlist_dashboard.csv",
+        mime="text/csv"
+    )
+
+
+def display_dashboard(inputs):
+    """
+    Watchlist-Dashboard: Bereiche, nächste In-Range-Level und Expansionen
+    aller Ticker in EINER Tabelle. Die Modell-Parameter kommen aus der
+    Sidebar (zuletzt mit 'Berechnen' übernommen, sonst Standardwerte).
+    """
+    st.subheader("Watchlist-Dashboard")
+    tickers = get_dashboard_watchlist()
+    if not tickers:
+        st.info("Watchlist eingeben und auf 'Watchlist rechnen' klicken.")
+        return
+
+    params = {k: inputs[k] for k in DEFAULT_PARAMS if k in inputs and k != "ticker"}
+    analysis_date = inputs.get("analysis_date", date.today())
+    st.caption(f"Analysedatum {analysis_date} | Parameter aus der Sidebar: "
+               + ", ".join(f"{k}={v}" for k, v in sorted(params.items())))
+
+    # Hintergrund-Lauf (calc_jobs) wie auf der Einzelwert-Seite; geänderte
+    # Watchlist oder Parameter brechen den alten Lauf ab. Jedes erneute
+    # 'Watchlist rechnen' rechnet neu (aktuelle Kursdaten; unveränderte
+    # Zeilen kommen aus dem Ergebnis-Cache).
+    job_key = (tuple(tickers), analysis_date, tuple(sorted(params.items())))
+    submit_count = st.session_state.get("dashboard_submit", 0)
+    job = st.session_state.get("dashboard_job")
+    if (job is None or job.key != job_key
+            or st.session_state.get("dashboard_job_submit") != submit_count):
+        if job is not None:
+            job.cancel()
+        print(f"[DEBUG ui_dashboard] Submitting dashboard job for {len(tickers)} Ticker")
+        rows = []
+        job = get_job_runner().submit(
+            job_key,
+            tickers,
+            run_dashboard_job,
+            tickers=tickers,
+            analysis_date=analysis_date,
+            params=params,
+            rows=rows
+        )
+        st.session_state["dashboard_job"] = job
+        st.session_state["dashboard_rows"] = rows
+        st.session_state["dashboard_job_submit"] = submit_count
+
+    job.touch()
+    if not job.wait(DASHBOARD_FAST_PATH_SECONDS):
+        display_dashboard_progress(job, st.session_state["dashboard_rows"])
+        return
+
+    if job.status == "abgebrochen":
+        st.info("Berechnung abgebrochen. Zum Neustart auf 'Watchlist rechnen' klicken.")
+        return
+    if job.status == "fehler":
+        st.error(f"Fehler bei der Berechnung: {job.error}")
+        print(f"[DEBUG ui_dashboard] Job {job.id} failed: {job.error!r}")
+        return
+
+    display_dashboard_table(job.result)
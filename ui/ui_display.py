@@ -1,9 +1,12 @@
 # ui_display.py
 
 import streamlit as st
-import plotly.graph_objects as go
 import pandas as pd
 
+from calculations.calc_pipeline import run_360_for_divider
+from ui.ui_charts import build_level_chart
+from ui.ui_sidebar import small_div_options
+
 def format_price(value: float) -> str:
     """
     Formatiert Zahlen nach deutschen Regeln
@@ -23,7 +26,7 @@ def format_price(value: float) -> str:
     temp_str = temp_str.replace(",", "X").replace(".", ",").replace("X", ".")
     return temp_str
 
-def display_results(ticker, basisdaten, ergebnisse, volatility, big_rhythm, small_div):
+def block_basisdaten(ticker, basisdaten, volatility, big_rhythm, small_div):
     # --------------------------------------------------
     # BLOCK 1: BASISDATEN
     # --------------------------------------------------
@@ -49,6 +52,8 @@ def display_results(ticker, basisdaten, ergebnisse, volatility, big_rhythm, smal
 
     st.markdown("---")
 
+
+def block_inrange(ergebnisse):
     # --------------------------------------------------
     # BLOCK 2: IN-RANGE-WERTE
     # --------------------------------------------------
@@ -80,51 +85,38 @@ def display_results(ticker, basisdaten, ergebnisse, volatility, big_rhythm, smal
 
     st.markdown("---")
 
+
+@st.fragment
+def block_chart(basisdaten, ergebnisse):
     # --------------------------------------------------
     # BLOCK 3: CHART (10 Vortageskerzen)
     # --------------------------------------------------
     st.subheader("Block 3: Börsenchart (10 Vortageskerzen)")
     df_chart = ergebnisse.get("df_chart")
     if df_chart is not None and not df_chart.empty:
-        fig = go.Figure(data=[go.Candlestick(
-            x=df_chart.index,
-            open=df_chart['Open'],
-            high=df_chart['High'],
-            low=df_chart['Low'],
-            close=df_chart['Close'],
-            name="OHLC"
-        )])
-
-        lb_val = basisdaten.get("range_unten")
-        ub_val = basisdaten.get("range_oben")
-        if lb_val is not None:
-            fig.add_hline(y=lb_val, line=dict(color="black", dash="dash"),
-                          annotation_text="Range-Untergrenze")
-        if ub_val is not None:
-            fig.add_hline(y=ub_val, line=dict(color="black", dash="dash"),
-                          annotation_text="Range-Obergrenze")
-
-        inrange_360 = ergebnisse.get("preise_inrange_360", [])
-        inrange_vorjahr = ergebnisse.get("preise_inrange_vorjahr", [])
-        inrange_vormonat = ergebnisse.get("preise_inrange_vormonat", [])
-
-        for preis in inrange_360:
-            fig.add_hline(y=preis, line=dict(color="green"), annotation_text="360°")
-        for preis in inrange_vorjahr:
-            fig.add_hline(y=preis, line=dict(color="red"), annotation_text="Vorjahr")
-        for preis in inrange_vormonat:
-            fig.add_hline(y=preis, line=dict(color="blue"), annotation_text="Vormonat")
-
-        fig.update_layout(
-            height=500,
-            xaxis_rangeslider_visible=False,
+        # Eigenes Bedienelement => nur dieses Fragment wird neu ausgeführt
+        linien = st.multiselect(
+            "Linien im Chart",
+            options=["360°", "Vorjahr", "Vormonat"],
+            default=["360°", "Vorjahr", "Vormonat"],
+            key="chart_linien",
         )
-        st.plotly_chart(fig, use_container_width=True)
+        fig = build_level_chart(
+            df_chart,
+            basisdaten.get("range_unten"),
+            basisdaten.get("range_oben"),
+            ergebnisse.get("preise_inrange_360", []) if "360°" in linien else [],
+            ergebnisse.get("preise_inrange_vorjahr", []) if "Vorjahr" in linien else [],
+            ergebnisse.get("preise_inrange_vormonat", []) if "Vormonat" in linien else [],
+        )
+        st.plotly_chart(fig, width="stretch")
     else:
         st.info("Keine Chart-Daten vorhanden oder DataFrame leer.")
 
     st.markdown("---")
 
+
+def block_legende():
     # --------------------------------------------------
     # BLOCK 4: LEGENDE
     # --------------------------------------------------
@@ -143,6 +135,8 @@ def display_results(ticker, basisdaten, ergebnisse, volatility, big_rhythm, smal
     )
     st.markdown("---")
 
+
+def block_expansionen(ergebnisse):
     # --------------------------------------------------
     # BLOCK 5: EXPANSIONSWERTE
     # --------------------------------------------------
@@ -174,6 +168,8 @@ def display_results(ticker, basisdaten, ergebnisse, volatility, big_rhythm, smal
 
     st.markdown("---")
 
+
+def block_datencheck(ergebnisse):
     # --------------------------------------------------
     # BLOCK 6: DATENCHECK – zuerst Vormonat, dann Vorjahr
     # --------------------------------------------------
@@ -220,3 +216,82 @@ def display_results(ticker, basisdaten, ergebnisse, volatility, big_rhythm, smal
             st.write(f"**Schrittweite** : {format_price(vj_schritt) if vj_schritt else 'n/a'}")
 
     st.markdown("---")
+
+
+def block_anker(anchor_results):
+    # --------------------------------------------------
+    # BLOCK 7: WEITERE ANKER (Jahre, Quartale, Monate, Wochen)
+    # --------------------------------------------------
+    st.subheader("Block 7: Weitere Anker")
+    st.write("""
+        Hoch/Tief der vorherigen Zeiträume mit ihrer Level-Reihe
+        (gleiche ATR-Range wie 360°).
+    """)
+
+    if not anchor_results:
+        st.write("Keine Anker-Daten gefunden.")
+        st.markdown("---")
+        return
+
+    rows = []
+    for r in anchor_results:
+        rows.append({
+            "Anker": r.anchor_label,
+            "Hoch": format_price(r.anchor_high),
+            "Tief": format_price(r.anchor_low),
+            "Teiler": r.divider_val,
+            "Schrittweite": format_price(r.step_val),
+            "In-Range": ", ".join(format_price(x) for x in r.in_range) or "-",
+            "Expansion": ", ".join(format_price(x) for x in r.expansions) or "-",
+        })
+    st.dataframe(pd.DataFrame(rows), hide_index=True, width="stretch")
+
+    st.markdown("---")
+
+
+@st.fragment
+def block_360(ticker, basisdaten, ergebnisse, volatility, big_rhythm, small_div):
+    """
+    Blöcke 1-5 (alles, was vom 360°-Raster abhängt) als Fragment mit
+    eigenem kleinen Teiler: eine Änderung rechnet nur das 360°-Raster neu
+    (Bereich aus dem Cache) und zeichnet nur diese Blöcke neu – ohne
+    Modell-Job, ohne Vorjahr/Vormonat und ohne Blöcke 6/7.
+    Nach jedem 'Berechnen' gilt wieder der Teiler aus der Sidebar.
+    """
+    submit_count = st.session_state.get("submit_count", 0)
+    if st.session_state.get("block_360_submit") != submit_count:
+        st.session_state["block_360_submit"] = submit_count
+        st.session_state["block_360_small_div"] = small_div
+
+    teiler = st.selectbox(
+        "Kleiner Teiler (nur 360°)",
+        options=small_div_options(big_rhythm),
+        key="block_360_small_div",
+        help="Schneller Wechsel des 360°-Teilers ohne Neuberechnung der übrigen Modelle."
+    )
+    if teiler != small_div:
+        result_360 = run_360_for_divider(st.session_state["submitted_inputs"], teiler)
+        ergebnisse = dict(ergebnisse,
+                          preise_inrange_360=result_360.in_range,
+                          preise_ausserhalb_360=result_360.expansions)
+
+    block_basisdaten(ticker, basisdaten, volatility, big_rhythm, teiler)
+    block_inrange(ergebnisse)
+    block_chart(basisdaten, ergebnisse)
+    block_legende()
+    block_expansionen(ergebnisse)
+
+
+def display_results(ticker, basisdaten, ergebnisse, volatility, big_rhythm, small_div,
+                    anchor_results=None):
+    """
+    Ergebnisseite, aufgeteilt in einzelne Blöcke. Die 360°-abhängigen
+    Blöcke 1-5 sind ein Fragment mit eigenem kleinen Teiler, der Chart
+    darin ein weiteres Fragment: Änderungen an deren Bedienelementen
+    zeichnen nur diese Blöcke neu, nicht die ganze Seite. Block 7
+    (weitere Anker) nur, wenn 'anchor_results' übergeben wird.
+    """
+    block_360(ticker, basisdaten, ergebnisse, volatility, big_rhythm, small_div)
+    block_datencheck(ergebnisse)
+    if anchor_results is not None:
+        block_anker(anchor_results)
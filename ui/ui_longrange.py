@@ -0,0 +1,67 @@
+# ui_longrange.py
+
+import streamlit as st
+import pandas as pd
+from datetime import timedelta
+
+from data.data_store import get_store
+from calculations.calc_downsample import downsample_ohlc
+from ui.ui_charts import build_longrange_chart
+
+# Chartbreite in Pixeln => Anzahl Eimer beim Verdichten
+CHART_WIDTH_PX = 1200
+
+
+@st.fragment
+def display_longrange_chart(ticker, analysis_date, basisdaten, ergebnisse):
+    """
+    Optionaler Langfrist-Chart über die volle (gecachte) Historie.
+    Der Zeitraum-Regler zoomt; bei jedem Zoom wird nur dieses Fragment
+    neu ausgeführt und serverseitig auf CHART_WIDTH_PX Eimer verdichtet,
+    so dass nie mehr Punkte als Pixel an den Browser gehen.
+    """
+    st.subheader("Langfrist-Chart (volle Historie)")
+
+    df_hist = get_store().get_history(ticker)
+    if df_hist.empty:
+        st.info("Keine Historie vorhanden.")
+        return
+
+    # Nur Kerzen bis zum Vortag (wie in den Modellen)
+    df_hist = df_hist[df_hist.index < pd.Timestamp(analysis_date)]
+    if df_hist.empty:
+        st.info("Keine Historie bis zum Vortag vorhanden.")
+        return
+
+    first_day = df_hist.index[0].date()
+    last_day = df_hist.index[-1].date()
+    default_start = max(first_day, last_day - timedelta(days=3 * 365))
+
+    # Nur ein Tag Historie: nichts zu zoomen (st.slider verlangt min < max)
+    if first_day == last_day:
+        zoom_start = zoom_end = first_day
+    else:
+        zoom_start, zoom_end = st.slider(
+            "Zeitraum",
+            min_value=first_day,
+            max_value=last_day,
+            value=(default_start, last_day),
+            format="DD.MM.YYYY",
+            key="longrange_zoom",
+        )
+
+    df_zoom = df_hist[(df_hist.index >= pd.Timestamp(zoom_start)) &
+                      (df_hist.index <= pd.Timestamp(zoom_end))]
+    df_plot = downsample_ohlc(df_zoom, CHART_WIDTH_PX)
+    print(f"[DEBUG ui_longrange] {len(df_zoom)} Kerzen -> {len(df_plot)} Punkte")
+
+    fig = build_longrange_chart(
+        df_plot,
+        basisdaten.get("range_unten"),
+        basisdaten.get("range_oben"),
+        ergebnisse.get("preise_inrange_360", []),
+        ergebnisse.get("preise_inrange_vorjahr", []),
+        ergebnisse.get("preise_inrange_vormonat", []),
+    )
+    st.plotly_chart(fig, width="stretch")
+    st.caption(f"{len(df_zoom)} Kerzen, dargestellt als {len(df_plot)} Punkte.")
@@ -0,0 +1,32 @@
+# ui_progress.py
+
+import time
+
+import streamlit as st
+
+# Abfrage-Intervall der Fortschrittsanzeige in Sekunden
+POLL_SECONDS = 0.5
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def display_job_progress(job):
+    """
+    Fortschritt eines Hintergrund-Laufs (calc_jobs.ModelJob). Nur dieses
+    Fragment wird alle POLL_SECONDS neu ausgeführt; sobald der Job fertig
+    ist, wird die ganze Seite neu aufgebaut und zeigt die Ergebnisse.
+    """
+    job.touch()
+    if job.done:
+        st.rerun()
+
+    if job.status == "wartend":
+        text = "Warte auf freien Rechen-Worker ..."
+    elif job.cancelled:
+        text = f"Wird abgebrochen (nach Stufe '{job.stage}') ..."
+    else:
+        text = f"{job.stage or 'Start'} ({job.stage_index + 1}/{len(job.stages)}) ..."
+    st.progress(job.progress, text=text)
+    st.caption(f"Job {job.id} läuft seit {time.time() - job.submitted_at:.0f}s")
+
+    if not job.cancelled and st.button("Abbrechen", key="job_abbrechen"):
+        job.cancel()
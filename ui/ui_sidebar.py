@@ -3,89 +3,139 @@
 import streamlit as st
 from datetime import date
 
-def get_sidebar_inputs():
-    # Session State für Button
-    if "start_button_pressed" not in st.session_state:
-        st.session_state["start_button_pressed"] = False
+from calculations.calc_pipeline import DEFAULT_PARAMS
 
-    if st.sidebar.button("Berechnen"):
-        st.session_state["start_button_pressed"] = True
+BASE_SMALL_DIVS = [180.0, 90.0, 45.0, 22.5, 11.25, 5.625]
 
-    # HIER jetzt Deine Inputs
-    ticker = st.sidebar.text_input("Wertpapier (Ticker)", "BTC-USD")
 
-    analysis_date = st.sidebar.date_input(
-        label="Gesuchtes Datum",
-        value=date.today(),
-        help="Datum für die Analyse..."
-    )
+def small_div_options(big_rhythm):
+    """
+    Kleine Teiler, skaliert auf den großen Rhythmus (Basis 360).
+    """
+    try:
+        factor = float(big_rhythm.replace(',', '.')) / 360.0
+    except:
+        factor = 1.0
+    return [round(d * factor, 4) for d in BASE_SMALL_DIVS]
 
-    mode_choice = st.sidebar.radio(
-        label="Suchmodus",
-        options=["hoch", "tief"],
-        index=0,
-        help="Art der gesuchten Preisprojektion."
-    )
 
-    volatility = st.sidebar.radio(
-        label="Volatilität",
-        options=["normal", "hoch"],
-        index=0,
-        help="ATR-Faktor: normal=1.0, hoch=1.5"
-    )
+VIEWS = ["Einzelwert", "Watchlist-Dashboard"]
 
-    atr_period = st.sidebar.number_input(
-        label="ATR-Periode (Tage)",
-        value=14,
-        min_value=1,
-        help="Anzahl Tage für die ATR-Berechnung."
-    )
 
-    vj_divider = st.sidebar.radio(
-        label="Teiler Vorjahr",
-        options=[8, 16],
-        index=1,
-        help="Teiler für das Vorjahr (8 oder 16)."
-    )
+def get_view_choice():
+    """
+    Seitenwahl: Einzelwert (Ergebnisblöcke für einen Ticker) oder
+    Watchlist-Dashboard (Tabelle für viele Ticker, ui_dashboard.py).
+    """
+    return st.sidebar.radio("Ansicht", options=VIEWS, index=0, key="ansicht")
 
-    vm_divider = st.sidebar.radio(
-        label="Teiler Vormonat",
-        options=[8, 16],
-        index=1,
-        help="Teiler für den Vormonat (8 oder 16)."
-    )
 
+def get_sidebar_inputs():
+    """
+    Eingaben als Formular: Änderungen an den Widgets lösen KEINEN Rerun aus,
+    erst "Berechnen" übernimmt alle Werte gesammelt. Zurückgegeben werden
+    immer die zuletzt abgeschickten Werte (in st.session_state gemerkt).
+    """
+    # Großer Rhythmus außerhalb des Formulars: bestimmt die Auswahl
+    # des kleinen Teilers und muss diese deshalb sofort aktualisieren.
     big_rhythm_options = ["0,36", "3,6", "36", "360", "3600"]
     big_rhythm = st.sidebar.selectbox(
         "Großer Rhythmus",
         options=big_rhythm_options,
-        index=3,
+        index=big_rhythm_options.index(DEFAULT_PARAMS["big_rhythm"]),
         help="Auswahl des großen Teilers (z.B. 360)"
     )
 
-    BASE_SMALL_DIVS = [180.0, 90.0, 45.0, 22.5, 11.25, 5.625]
-    try:
-        factor = float(big_rhythm.replace(',', '.')) / 360.0
-    except:
-        factor = 1.0
-    scaled_divs = [round(d * factor, 4) for d in BASE_SMALL_DIVS]
-    small_div = st.sidebar.selectbox(
-        "Kleiner Teiler",
-        options=scaled_divs,
-        index=2,
-        help="Skalierter Wert basierend auf dem großen Rhythmus."
-    )
+    scaled_divs = small_div_options(big_rhythm)
+
+    with st.sidebar.form("eingaben"):
+        # HIER jetzt Deine Inputs
+        ticker = st.text_input("Wertpapier (Ticker)", DEFAULT_PARAMS["ticker"])
+
+        analysis_date = st.date_input(
+            label="Gesuchtes Datum",
+            value=date.today(),
+            help="Datum für die Analyse..."
+        )
+
+        mode_choice = st.radio(
+            label="Suchmodus",
+            options=["hoch", "tief"],
+            index=["hoch", "tief"].index(DEFAULT_PARAMS["mode_choice"]),
+            help="Art der gesuchten Preisprojektion."
+        )
+
+        volatility = st.radio(
+            label="Volatilität",
+            options=["normal", "hoch"],
+            index=["normal", "hoch"].index(DEFAULT_PARAMS["volatility"]),
+            help="ATR-Faktor: normal=1.0, hoch=1.5"
+        )
+
+        atr_period = st.number_input(
+            label="ATR-Periode (Tage)",
+            value=DEFAULT_PARAMS["atr_period"],
+            min_value=1,
+            help="Anzahl Tage für die ATR-Berechnung."
+        )
+
+        vj_divider = st.radio(
+            label="Teiler Vorjahr",
+            options=[8, 16],
+            index=[8, 16].index(DEFAULT_PARAMS["vj_divider"]),
+            help="Teiler für das Vorjahr (8 oder 16)."
+        )
+
+        vm_divider = st.radio(
+            label="Teiler Vormonat",
+            options=[8, 16],
+            index=[8, 16].index(DEFAULT_PARAMS["vm_divider"]),
+            help="Teiler für den Vormonat (8 oder 16)."
+        )
+
+        small_div = st.selectbox(
+            "Kleiner Teiler",
+            options=scaled_divs,
+            index=2,
+            help="Skalierter Wert basierend auf dem großen Rhythmus."
+        )
+
+        anchor_periods = st.number_input(
+            label="Weitere Anker (Vorperioden je Art)",
+            value=DEFAULT_PARAMS["anchor_periods"],
+            min_value=0,
+            max_value=12,
+            help="Hoch/Tief der letzten N Jahre, Quartale, Monate und Wochen als zusätzliche Level-Reihen (0 = aus)."
+        )
+
+        show_longrange = st.checkbox(
+            "Langfrist-Chart anzeigen",
+            value=False,
+            help="Zusätzlicher Chart über die volle Historie (zoombar)."
+        )
+
+        submitted = st.form_submit_button("Berechnen")
+
+    if submitted:
+        # Zähler: erneutes "Berechnen" mit gleichen Werten startet einen
+        # abgebrochenen oder fehlgeschlagenen Lauf neu (app.py)
+        st.session_state["submit_count"] = st.session_state.get("submit_count", 0) + 1
+        st.session_state["submitted_inputs"] = {
+            "ticker": ticker,
+            "analysis_date": analysis_date,
+            "mode_choice": mode_choice,
+            "volatility": volatility,
+            "atr_period": atr_period,
+            "vj_divider": vj_divider,
+            "vm_divider": vm_divider,
+            "big_rhythm": big_rhythm,
+            "small_div": small_div,
+            "anchor_periods": anchor_periods,
+            "show_longrange": show_longrange,
+        }
 
-    # GANZ AM ENDE: return
-    return {
-        "ticker": ticker,
-        "analysis_date": analysis_date,
-        "mode_choice": mode_choice,
-        "volatility": volatility,
-        "atr_period": atr_period,
-        "vj_divider": vj_divider,
-        "vm_divider": vm_divider,
-        "big_rhythm": big_rhythm,
-        "small_div": small_div,
-        "start_button": st.session_state["start_button_pressed"]
-    }
+    # GANZ AM ENDE: return (zuletzt abgeschickte Werte)
+    inputs = st.session_state.get("submitted_inputs")
+    if inputs is None:
+        return {"start_button": False}
+    return dict(inputs, start_button=True)